@@ -12,5 +12,82 @@ LLM_MODEL = os.getenv("LLM_MODEL")
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.2"))
 GROQ_ENDPOINT = os.getenv("GROQ_ENDPOINT", "https://api.groq.com/openai/v1/chat/completions")
 DBT_DIR = os.getenv("DBT_DIR", "dbt_models")
+# Worker pool size for tools.sql2dbt_bulk
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+# Shared Groq HTTP client (keep-alive pool + timeouts in seconds)
+GROQ_POOL_SIZE = int(os.getenv("GROQ_POOL_SIZE", "10"))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", "15"))
+# LLM response cache (memory LRU in front of SQLite; TTL in seconds)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_MEMORY = int(os.getenv("LLM_CACHE_MAX_MEMORY", "512"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+# Calc explanations: "local" (step-by-step from the AST) or "rich" (Groq narrates the answer)
+CALC_EXPLAIN_MODE = os.getenv("CALC_EXPLAIN_MODE", "local").lower()
+# Speculative routing: below this router confidence, run the top candidate tools in
+# parallel and keep the first result that passes evaluate (deadline in seconds)
+SPECULATIVE_ENABLED = os.getenv("SPECULATIVE_ENABLED", "false").lower() == "true"
+SPECULATIVE_CONFIDENCE = float(os.getenv("SPECULATIVE_CONFIDENCE", "0.6"))
+SPECULATIVE_MAX_TOOLS = int(os.getenv("SPECULATIVE_MAX_TOOLS", "3"))
+SPECULATIVE_DEADLINE = float(os.getenv("SPECULATIVE_DEADLINE", "10"))
+SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", "8"))
+# Search result cache (TTL in seconds)
+SEARCH_REGION = os.getenv("SEARCH_REGION", "wt-wt")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+# Search backends: "sequential" fallback or "hedged" (parallel after a delay, bounded by a deadline);
+# hedges run on their own pool and each ddgs call is capped at SEARCH_BACKEND_TIMEOUT
+SEARCH_MODE = os.getenv("SEARCH_MODE", "sequential").lower()
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "8"))
+SEARCH_HEDGE_DELAY = float(os.getenv("SEARCH_HEDGE_DELAY", "1.5"))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "8"))
+SEARCH_HEDGE_WORKERS = int(os.getenv("SEARCH_HEDGE_WORKERS", "8"))
+SEARCH_BACKEND_TIMEOUT = float(os.getenv("SEARCH_BACKEND_TIMEOUT", "8"))
+# Local FTS5 index of fetched hits: served first when >= MIN_HITS fresh hits match MIN_MATCH of the query terms
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", ".cache/search_index.sqlite")
+SEARCH_INDEX_FRESHNESS = float(os.getenv("SEARCH_INDEX_FRESHNESS", "86400"))
+SEARCH_INDEX_MAX_ENTRIES = int(os.getenv("SEARCH_INDEX_MAX_ENTRIES", "5000"))
+SEARCH_INDEX_MIN_MATCH = float(os.getenv("SEARCH_INDEX_MIN_MATCH", "0.8"))
+SEARCH_INDEX_MIN_HITS = int(os.getenv("SEARCH_INDEX_MIN_HITS", "3"))
+# Search post-processing: raw hits requested per wanted hit, and snippet-similarity (Jaccard) for dedup
+SEARCH_OVERFETCH = int(os.getenv("SEARCH_OVERFETCH", "2"))
+SEARCH_DUP_THRESHOLD = float(os.getenv("SEARCH_DUP_THRESHOLD", "0.8"))
+# Groq rate limiting (per minute; 0 disables a bucket) and 429/5xx backoff
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "6000"))
+GROQ_MAX_QUEUE = int(os.getenv("GROQ_MAX_QUEUE", "64"))
+GROQ_MAX_WAIT = float(os.getenv("GROQ_MAX_WAIT", "30"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))
+GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "20"))
+GROQ_EST_COMPLETION_TOKENS = int(os.getenv("GROQ_EST_COMPLETION_TOKENS", "256"))
+# Default in-flight limit for graph.abatch
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "32"))
+# Streamlit background jobs: shared worker pool and cross-session result cache (TTL in seconds)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+# Durable checkpoints for graph.run(..., run_id=...): SQLite file, idle TTL (s), max kept runs
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite")
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", "604800"))
+CHECKPOINT_MAX_RUNS = int(os.getenv("CHECKPOINT_MAX_RUNS", "1000"))
+# Headless HTTP server (server.py): worker pool, admission queue, default timeout in seconds
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "8"))
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "32"))
+SERVER_TIMEOUT = float(os.getenv("SERVER_TIMEOUT", "60"))
+# Langfuse tracing: fraction of runs traced, and the bounded export queue (full = drop)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+# Record node input/output (the whole state, SQL included) on each span; false keeps spans O(1)
+TRACE_CAPTURE_IO = os.getenv("TRACE_CAPTURE_IO", "true").lower() == "true"
+# Prometheus /metrics and /metrics.json endpoint (0 disables it)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
 # Toggle debug logging
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
@@ -0,0 +1,49 @@
+import timeit
+from utils.logger import logger
+from tools.registry import Router, ToolSpec, list_tools
+
+GOALS = [
+    "calc 2+3*5",
+    "convert sql to a dbt model: select * from orders",
+    "find LangGraph docs about cyclic workflows",
+    "what's the weather like in Lisbon today",
+]
+
+
+def _synthetic_tools(count: int):
+    specs = list(list_tools())
+    for i in range(count):
+        specs.append(ToolSpec(name=f"tool_{i}", func=lambda s: s, triggers=(f"internal{i}", f"svc-{i} lookup", f"report {i}")))
+    return specs
+
+
+def _linear_route(specs, goal: str) -> str:
+    """The old plan_node approach: one any(k in goal) scan per tool."""
+    goal = goal.lower()
+    for spec in specs:
+        if any(k in goal for k in spec.triggers):
+            return spec.name
+    return "search"
+
+
+def bench_router(tool_counts=(0, 10, 50, 200), number: int = 2000):
+    """Microseconds per routed goal, linear keyword scan vs the compiled router."""
+    rows = []
+    for count in tool_counts:
+        specs = _synthetic_tools(count)
+        router = Router(specs, "search")
+        linear = timeit.timeit(lambda: [_linear_route(specs, g) for g in GOALS], number=number)
+        compiled = timeit.timeit(lambda: [router.route(g) for g in GOALS], number=number)
+        per_call = number * len(GOALS)
+        rows.append({
+            "tools": len(specs),
+            "linear_us": round(linear / per_call * 1e6, 3),
+            "compiled_us": round(compiled / per_call * 1e6, 3),
+        })
+    for row in rows:
+        logger.info(f"Router bench: {row}")
+    return rows
+
+
+if __name__ == "__main__":
+    bench_router()
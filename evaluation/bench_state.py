@@ -0,0 +1,107 @@
+"""
+Micro-benchmark of per-node-transition overhead for the graph state.
+
+Runs a chain of trivial nodes (each bumps `attempts`, the way real nodes
+touch one or two fields) with an SQL payload of growing size in
+`context`, once with the previous pydantic AgentState (nodes return the
+whole model, so every field is rewritten every step) and once with the
+current dataclass + updates_only. With --checkpoint an InMemorySaver is
+attached, which is where rewriting large unchanged channels shows up.
+
+    python -m evaluation.bench_state --sizes 1024 65536 1048576 --checkpoint
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from utils.state import AgentState, updates_only
+
+STEPS = 16
+
+
+class LegacyAgentState(BaseModel):
+    """AgentState as it was before the dataclass (kept here only for comparison)."""
+    goal: str = Field(..., description="User objective or query")
+    tool: Optional[str] = Field(None, description="Which tool to run: calc|sql2dbt|search")
+    attempts: int = Field(0, description="Number of attempts to run the tools", ge=0, le=10 ** 6)
+    max_attempts: int = 4
+    code: Optional[str] = None
+    result: Optional[Any] = None
+    errors: List[str] = []
+    context: Dict[str, Any] = {}
+    tests_passed: bool = False
+    terminal: bool = False
+
+
+def _step(state):
+    state.attempts += 1
+    return state
+
+
+def build_chain(state_cls, wrap=lambda f: f, steps: int = STEPS, checkpointer=None):
+    from langgraph.graph import StateGraph, START, END
+
+    graph = StateGraph(state_cls)
+    names = [f"n{i}" for i in range(steps)]
+    for name in names:
+        graph.add_node(name, wrap(_step))
+    graph.add_edge(START, names[0])
+    for a, b in zip(names, names[1:]):
+        graph.add_edge(a, b)
+    graph.add_edge(names[-1], END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def per_transition_us(app, sql: str, repeats: int, steps: int = STEPS, checkpoint: bool = False) -> float:
+    initial = {"goal": "bench", "context": {"sql": sql, "llm_output": sql}}
+    best = float("inf")
+    for i in range(repeats):
+        config = {"configurable": {"thread_id": f"t{i}"}} if checkpoint else None
+        start = time.perf_counter()
+        out = app.invoke(initial, config)
+        best = min(best, time.perf_counter() - start)
+        assert out["attempts"] == steps and out["context"]["sql"] is not None
+    return round(best / steps * 1e6, 1)
+
+
+def run_bench(sizes: List[int], repeats: int = 5, checkpoint: bool = False) -> List[Dict]:
+    rows = []
+    for size in sizes:
+        sql = ("select * from orders where id = 1\n" * (size // 34 + 1))[:size]
+        row = {"sql_bytes": size}
+        for label, state_cls, wrap in (("legacy", LegacyAgentState, lambda f: f),
+                                       ("current", AgentState, updates_only)):
+            saver = None
+            if checkpoint:
+                from langgraph.checkpoint.memory import InMemorySaver
+                saver = InMemorySaver()
+            app = build_chain(state_cls, wrap, checkpointer=saver)
+            row[f"{label}_us"] = per_transition_us(app, sql, repeats, checkpoint=checkpoint)
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-transition graph state overhead, legacy vs current.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1 << 10, 1 << 14, 1 << 17, 1 << 20],
+                        help="SQL payload sizes in bytes.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--checkpoint", action="store_true", help="Attach an InMemorySaver checkpointer.")
+    parser.add_argument("--out", help="Also write the rows as JSON.")
+    args = parser.parse_args(argv)
+
+    rows = run_bench(args.sizes, args.repeats, args.checkpoint)
+    print(f"{'sql bytes':>10}  {'legacy us':>10}  {'current us':>10}")
+    for row in rows:
+        print(f"{row['sql_bytes']:>10}  {row['legacy_us']:>10}  {row['current_us']:>10}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
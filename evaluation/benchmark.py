@@ -0,0 +1,220 @@
+"""
+Offline end-to-end benchmark for the agent graph.
+
+Groq is replaced by a local FakeGroqServer (the shared sync client and the
+per-loop async clients are swapped to point at it) and search by a fake
+backend registered via register_backend, so the numbers
+measure this code rather than the network. Reports per-node and end-to-end
+p50/p95/p99 latency and runs/sec at several concurrency levels, and writes
+them to JSON so runs on two commits can be compared:
+
+    python -m evaluation.benchmark --levels 1 4 16 --runs 64 --out bench.json
+    python -m evaluation.benchmark --compare bench.json
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+
+from evaluation.fakes import FakeGroqServer, make_fake_search
+
+# {i} keeps goals unique per run so caches don't turn the benchmark into a cache benchmark.
+WORKLOAD = [
+    "calc 2+3*{i}",
+    "calc I bought {i} * 3 apples and then + 4 more",
+    "convert sql to dbt: select order_id, amount from orders where amount > {i}",
+    "sql2dbt insert into audit select * from events_{i}",
+    "find LangGraph docs about cyclic workflows {i}",
+]
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99 in milliseconds."""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "count": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "p50": round(rank(50) * 1000, 3),
+        "p95": round(rank(95) * 1000, 3),
+        "p99": round(rank(99) * 1000, 3),
+        "count": len(ordered),
+    }
+
+
+def timed_run(goal: str) -> dict:
+    """One graph run with wall time per node (from LangGraph task events) and end to end."""
+    import graph
+
+    nodes: Dict[str, List[float]] = {}
+    started: Dict[str, float] = {}
+    final = None
+    t0 = time.perf_counter()
+    for mode, chunk in graph.app.stream(graph._initial_state(goal), stream_mode=["tasks", "values"]):
+        if mode == "values":
+            final = chunk
+        elif "result" in chunk:
+            begin = started.pop(chunk["id"], None)
+            if begin is not None:
+                nodes.setdefault(chunk["name"], []).append(time.perf_counter() - begin)
+        else:
+            started[chunk["id"]] = time.perf_counter()
+    return {
+        "total": time.perf_counter() - t0,
+        "nodes": nodes,
+        "ok": bool(final and final.get("tests_passed")),
+    }
+
+
+def run_level(concurrency: int, runs: int, workload: Sequence[str] = WORKLOAD) -> dict:
+    goals = [workload[i % len(workload)].format(i=i) for i in range(runs)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(timed_run, goals))
+    elapsed = time.perf_counter() - start
+
+    node_times: Dict[str, List[float]] = {}
+    for sample in samples:
+        for node, times in sample["nodes"].items():
+            node_times.setdefault(node, []).extend(times)
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_sec": round(runs / elapsed, 2) if elapsed else 0.0,
+        "success_rate": round(sum(s["ok"] for s in samples) / runs, 3) if runs else 0.0,
+        "end_to_end_ms": percentiles([s["total"] for s in samples]),
+        "nodes_ms": {node: percentiles(times) for node, times in sorted(node_times.items())},
+    }
+
+
+@contextmanager
+def offline_services(llm_latency: float = 0.05, llm_jitter: float = 0.0, error_rate: float = 0.0,
+                     search_latency: float = 0.02):
+    """
+    Start the fake Groq server, point the shared and per-loop async clients
+    at it and swap the search backends for the fake one (local snippet index off); everything
+    is restored on exit.
+    """
+    from tools import search_agent
+    from tools.search_index import set_search_index
+    from utils.groq_client import AsyncGroqClient, GroqClient, set_async_client_factory, set_client
+
+    server = FakeGroqServer(latency=llm_latency, jitter=llm_jitter, error_rate=error_rate).start()
+    previous_client = set_client(GroqClient(api_key="bench", endpoint=server.url, cache=None, limiter=None))
+    previous_factory = set_async_client_factory(
+        lambda: AsyncGroqClient(api_key="bench", endpoint=server.url, cache=None, limiter=None)
+    )
+    previous_index = set_search_index(None)
+    previous_backends = dict(search_agent.SEARCH_BACKENDS)
+    search_agent.SEARCH_BACKENDS.clear()
+    search_agent.register_backend("fake", make_fake_search(search_latency))
+    try:
+        yield server
+    finally:
+        search_agent.SEARCH_BACKENDS.clear()
+        search_agent.SEARCH_BACKENDS.update(previous_backends)
+        set_search_index(previous_index)
+        set_async_client_factory(previous_factory)
+        set_client(previous_client)
+        server.stop()
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run_benchmark(levels: Sequence[int] = (1, 4, 16), runs: int = 48, llm_latency: float = 0.05,
+                  llm_jitter: float = 0.0, error_rate: float = 0.0, search_latency: float = 0.02) -> dict:
+    from utils.logger import logger
+
+    with offline_services(llm_latency, llm_jitter, error_rate, search_latency) as server:
+        timed_run(WORKLOAD[0].format(i=0))  # warm imports and lazy singletons
+        results = []
+        for level in levels:
+            row = run_level(level, runs)
+            logger.info(f"Benchmark c={level}: {row['runs_per_sec']} runs/s, e2e {row['end_to_end_ms']}")
+            results.append(row)
+        llm_requests = server.requests
+    return {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "runs": runs,
+            "llm_latency": llm_latency,
+            "llm_jitter": llm_jitter,
+            "error_rate": error_rate,
+            "search_latency": search_latency,
+        },
+        "llm_requests": llm_requests,
+        "levels": results,
+    }
+
+
+def compare(current: dict, previous: dict) -> List[str]:
+    """Human-readable deltas (current vs previous) per concurrency level."""
+    lines = []
+    before = {row["concurrency"]: row for row in previous.get("levels", [])}
+    for row in current["levels"]:
+        old = before.get(row["concurrency"])
+        if not old:
+            continue
+        parts = [f"c={row['concurrency']}"]
+        for key in ("p50", "p95", "p99"):
+            a, b = old["end_to_end_ms"][key], row["end_to_end_ms"][key]
+            parts.append(f"{key} {a:.1f}->{b:.1f}ms ({(b - a) / a * 100 if a else 0:+.1f}%)")
+        a, b = old["runs_per_sec"], row["runs_per_sec"]
+        parts.append(f"runs/s {a:.1f}->{b:.1f} ({(b - a) / a * 100 if a else 0:+.1f}%)")
+        lines.append("  ".join(parts))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmark for the agent graph.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16], help="Concurrency levels.")
+    parser.add_argument("--runs", type=int, default=48, help="Graph runs per level.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake Groq latency in seconds.")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="Uniform +/- jitter on the latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Groq calls failing with 429/503.")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Fake search latency in seconds.")
+    parser.add_argument("--out", default="benchmark_results.json", help="Where to write the JSON report.")
+    parser.add_argument("--compare", help="Previous JSON report to diff against.")
+    args = parser.parse_args(argv)
+
+    # Must happen before config is imported: enable the LLM nodes, keep the
+    # benchmark off the real network, caches, rate limits and dbt_models/.
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["GROQ_RPM"] = "0"
+    os.environ["GROQ_TPM"] = "0"
+    os.environ["SEARCH_CACHE_TTL"] = "0"
+    os.environ["SEARCH_INDEX_ENABLED"] = "false"
+    os.environ["DBT_DIR"] = tempfile.mkdtemp(prefix="bench_dbt_")
+
+    report = run_benchmark(args.levels, args.runs, args.llm_latency, args.llm_jitter,
+                           args.error_rate, args.search_latency)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for line in compare(report, json.load(f)):
+                print(line)
+    return report
+
+
+if __name__ == "__main__":
+    main()
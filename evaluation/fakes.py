@@ -0,0 +1,129 @@
+"""
+Local stand-ins for Groq and the search backends, for offline tests and benchmarks.
+
+FakeGroqServer speaks the OpenAI-compatible chat completions protocol
+(JSON and stream=True SSE) on 127.0.0.1; point a GroqClient /
+AsyncGroqClient at it with endpoint=server.url (offline_services in
+evaluation.benchmark does this for the shared clients).
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _fake_answer(messages) -> str:
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    if "math parser" in system:
+        tokens = re.findall(r"[0-9]+(?:\.[0-9]+)?|[+\-*/()]", user)
+        return " ".join(tokens) or "0"
+    if "dbt" in system:
+        sql = user.split("SQL:", 1)[-1].strip()
+        return "{{ config(materialized='view') }}\n" + sql
+    return f"Here is a step-by-step answer. {user[:80]}"
+
+
+class FakeGroqServer:
+    """
+    Threaded OpenAI-compatible chat endpoint with configurable latency and
+    error rate (errors alternate 429 with Retry-After: 0 and 503).
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, chunk_words: int = 3):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunk_words = chunk_words
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/openai/v1/chat/completions"
+
+    def start(self) -> "FakeGroqServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                server._handle(self, body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler, body):
+        with self._lock:
+            self.requests += 1
+            failing = random.random() < self.error_rate
+            if failing:
+                self.errors += 1
+                status = 429 if self.errors % 2 else 503
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if failing:
+            payload = json.dumps({"error": {"message": "fake failure"}}).encode()
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                handler.send_header("Retry-After", "0")
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+
+        content = _fake_answer(body.get("messages") or [])
+        if body.get("stream"):
+            words = content.split(" ")
+            chunks = [" ".join(words[i:i + self.chunk_words]) + " " for i in range(0, len(words), self.chunk_words)]
+            lines = [f"data: {json.dumps({'choices': [{'delta': {'content': c}}]})}\n\n" for c in chunks]
+            payload = ("".join(lines) + "data: [DONE]\n\n").encode()
+            content_type = "text/event-stream"
+        else:
+            usage = {"total_tokens": len(content) // 4 + 10}
+            payload = json.dumps({"choices": [{"message": {"content": content}}], "usage": usage}).encode()
+            content_type = "application/json"
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+def make_fake_search(latency: float = 0.02, results: int = 5):
+    """Search backend stand-in with the same (query, max_results, region) signature."""
+
+    def fake_search(query: str, max_results: int = 5, region: str = "wt-wt"):
+        time.sleep(latency)
+        return [
+            {"title": f"{query} - result {i}", "link": f"https://example.com/{i}", "snippet": f"About {query} ({i})."}
+            for i in range(min(results, max_results))
+        ]
+
+    return fake_search
@@ -0,0 +1,84 @@
+"""
+Cold-start report: what `import graph` costs, which modules dominate it,
+and how long the first get_app() / tool import take. Each measurement runs
+in a fresh interpreter so nothing is already cached in sys.modules.
+
+    python -m evaluation.startup_report --top 15 --out startup.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+_PHASES = """
+import json, time
+t0 = time.perf_counter()
+import graph
+t1 = time.perf_counter()
+graph.get_app()
+t2 = time.perf_counter()
+from tools.registry import preload_tools
+preload_tools()
+t3 = time.perf_counter()
+print(json.dumps({"import_graph": t1 - t0, "compile_app": t2 - t1, "import_tools": t3 - t2}))
+"""
+
+
+def import_times(module: str = "graph") -> List[Dict]:
+    """Parse `python -X importtime` output into {module, self_ms, cumulative_ms, depth} rows."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]  # one separator space; the rest is nesting indentation
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return rows
+
+
+def phase_times() -> Dict[str, float]:
+    proc = subprocess.run([sys.executable, "-c", _PHASES], capture_output=True, text=True, check=True)
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {k: round(v * 1000, 1) for k, v in phases.items()}
+
+
+def startup_report(top: int = 15) -> dict:
+    rows = import_times()
+    first_party = ("graph", "config", "tools", "utils", "monitoring")
+    return {
+        "phases_ms": phase_times(),
+        "top_cumulative": sorted(rows, key=lambda r: -r["cumulative_ms"])[:top],
+        "top_self": sorted(rows, key=lambda r: -r["self_ms"])[:top],
+        "first_party": [r for r in rows if r["module"].split(".")[0] in first_party],
+        "modules_loaded": len(rows),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report cold-start import cost of the agent graph.")
+    parser.add_argument("--top", type=int, default=15, help="How many modules to list.")
+    parser.add_argument("--out", help="Also write the report as JSON.")
+    args = parser.parse_args(argv)
+
+    report = startup_report(args.top)
+    print("Phases (ms):", report["phases_ms"])
+    print(f"Modules imported by `import graph`: {report['modules_loaded']}")
+    print("Slowest imports (cumulative ms):")
+    for row in report["top_cumulative"]:
+        print(f"  {row['cumulative_ms']:9.1f}  {row['module']}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,234 +1,597 @@
 
-from langgraph.graph import StateGraph, START, END
-from langfuse import observe
-from utils.state import AgentState
-from tools.calc_agent import calc_tool
-from tools.search_agent import search_tool
-from tools.sql2dbt_agent import sql2dbt_tool
+import contextvars
+import copy
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from monitoring.monitor import sampled_run, traced
+from monitoring.metrics import serve_from_config, track_node
+from utils.state import AgentState, updates_only
+from tools.registry import get_hook, get_tool, list_tools, preload_tools, route
 from utils.prompts import sql2dbt_system_prompt
-from config import GROQ_API_KEY, LLM_MODEL, TEMPERATURE, GROQ_ENDPOINT
-import requests
+from utils.errors import is_terminal
+from utils.groq_client import get_client, get_async_client, GroqAPIError
+from utils.rate_limit import RateLimitShed
+from utils.logger import logger
+from config import (
+    GROQ_API_KEY, TEMPERATURE, ASYNC_MAX_CONCURRENCY, CALC_EXPLAIN_MODE,
+    SPECULATIVE_ENABLED, SPECULATIVE_CONFIDENCE, SPECULATIVE_MAX_TOOLS, SPECULATIVE_DEADLINE, SPECULATIVE_WORKERS,
+)
+
+# langgraph and the tool modules are imported on first use (get_app / the
+# fast paths below) so `import graph` stays cheap for UIs and servers.
+
+# ---------------------------
+# LLM helpers (shared by sync and async nodes)
+# ---------------------------
+
+def _call_llm(state: AgentState, messages, temperature: float, failure: str, node: str = None):
+    """
+    Run a chat completion; on failure record the error and return None.
+    When the run is streaming (context["stream"]) and `node` is given, tokens
+    are forwarded to LangGraph's custom stream as they arrive.
+    """
+    use_cache = not state.context.get("bypass_cache")
+    try:
+        if node and state.context.get("stream"):
+            from langgraph.config import get_stream_writer
+            writer = get_stream_writer()
+            parts = []
+            for token in get_client().chat_stream(messages, temperature=temperature, use_cache=use_cache):
+                parts.append(token)
+                writer({"type": "token", "node": node, "text": token})
+            return "".join(parts).strip()
+        return get_client().chat(messages, temperature=temperature, use_cache=use_cache)
+    except (GroqAPIError, RateLimitShed) as e:
+        state.errors.append(str(e))
+    except Exception as e:
+        state.errors.append(f"{failure}: {e}")
+    return None
+
+
+async def _acall_llm(state: AgentState, messages, temperature: float, failure: str, node: str = None):
+    """Async twin of _call_llm over the non-blocking client."""
+    use_cache = not state.context.get("bypass_cache")
+    try:
+        if node and state.context.get("stream"):
+            from langgraph.config import get_stream_writer
+            writer = get_stream_writer()
+            parts = []
+            async for token in get_async_client().chat_stream(messages, temperature=temperature, use_cache=use_cache):
+                parts.append(token)
+                writer({"type": "token", "node": node, "text": token})
+            return "".join(parts).strip()
+        return await get_async_client().chat(messages, temperature=temperature, use_cache=use_cache)
+    except (GroqAPIError, RateLimitShed) as e:
+        state.errors.append(str(e))
+    except Exception as e:
+        state.errors.append(f"{failure}: {e}")
+    return None
+
+
+def _generate_locally(state: AgentState) -> bool:
+    """Fast path: convert common SELECTs with the local sqlparse transformer instead of Groq."""
+    if state.tool != "sql2dbt":
+        return False
+    from tools.sql2dbt_agent import sanitize_model_name
+    from tools.sql_transformer import transform_sql
+    model_name = sanitize_model_name(state.context.get("model_name", "generated_model"))
+    content = transform_sql(state.context.get("sql") or state.goal, model_name)
+    if not content:
+        return False
+    state.context["dbt_model"] = content
+    state.context["dbt_source"] = "local"
+    return True
+
+
+def _generate_messages(state: AgentState):
+    if not GROQ_API_KEY or state.tool != "sql2dbt":
+        return None
+    # Updated prompt to enforce single best model
+    user_prompt = (
+        "Convert this SQL into ONE best dbt model only. "
+        "Include a config() block with the materialization and unique_key inferred from the statement, "
+        "and a loaded_at column. "
+        "Do not provide multiple options or explanations. "
+        f"SQL:\n{state.context.get('sql') or state.goal}"
+    )
+    return [
+        {"role": "system", "content": sql2dbt_system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def _apply_generated(state: AgentState, generated_text: str) -> AgentState:
+    if generated_text:
+        state.context["sql"] = generated_text
+    else:
+        state.errors.append("Groq returned empty content.")
+    return state
+
+
+def _interpret_locally(state: AgentState) -> bool:
+    """Fast path: skip the LLM when the goal already is (or trivially maps to) arithmetic."""
+    if state.tool != "calc":
+        return False
+    from tools.calc_agent import parse_local_expression
+    expression = parse_local_expression(state.goal)
+    if not expression:
+        return False
+    state.context["expression"] = expression
+    state.context["expression_source"] = "local"
+    return True
+
+
+def _interpret_messages(state: AgentState):
+    if state.tool != "calc" or not GROQ_API_KEY:
+        return None
+    user_prompt = (
+        f"Extract only the arithmetic expression from this text: {state.goal}. "
+        "Return ONLY the expression, no explanation, no words."
+    )
+    return [
+        {"role": "system", "content": "You are a math parser. Return only the arithmetic expression."},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def _apply_expression(state: AgentState, expression: str) -> AgentState:
+    if expression:
+        state.context["expression"] = expression
+    else:
+        state.errors.append("LLM did not return an expression.")
+    return state
+
+
+def _explain_locally(state: AgentState, allow_llm: bool = True) -> bool:
+    """
+    Fast path: narrate the computed expression from its AST. Returns False
+    only when the run asked for the LLM ("rich") explanation and Groq is set up.
+    """
+    if state.tool != "calc" or not state.result or state.result.get("explanation"):
+        return True
+    if allow_llm and (state.context.get("explain") or CALC_EXPLAIN_MODE) == "rich" and GROQ_API_KEY:
+        return False
+    from tools.calc_agent import explain_expression
+    try:
+        state.result["explanation"] = explain_expression(state.result["expression"])
+    except (ValueError, SyntaxError, ArithmeticError) as e:
+        logger.debug(f"Local explanation skipped: {e}")
+    return True
+
+
+def _explain_messages(state: AgentState):
+    user_prompt = (
+        f"Original question: {state.goal}\n"
+        f"Computed expression: {state.result.get('expression')}\n"
+        f"Result: {state.result.get('value')}\n\n"
+        "Respond to the original question in a helpful way. "
+        "Explain the steps clearly and include the final result."
+    )
+    return [
+        {"role": "system", "content": ("You are a helpful math assistant."
+                "Use the expression and result to answer the original question clearly.")},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def _apply_explanation(state: AgentState, explanation: str) -> AgentState:
+    if explanation:
+        state.result["explanation"] = explanation
+    else:
+        _explain_locally(state, allow_llm=False)  # LLM failed: fall back to the local walk-through
+    return state
 
 # ---------------------------
 # Node Definitions
 # ---------------------------
 
-@observe(name="generate", as_type="generation")
+@traced("generate", as_type="generation")
+@track_node("generate")
 def generate_node(state: AgentState) -> AgentState:
     """Uses Groq API to refine or generate SQL/dbt code dynamically."""
-    if not GROQ_API_KEY:
+    if _generate_locally(state):
         return state
-
-    if state.tool == "sql2dbt":
-        # Updated prompt to enforce single best model
-        user_prompt = (
-            "Convert this SQL into ONE best dbt model only. "
-            "Include config(materialized='incremental', unique_key='order_id') and loaded_at column. "
-            "Do not provide multiple options or explanations. "
-            f"SQL:\n{state.context.get('sql') or state.goal}"
-        )
-        system_prompt = sql2dbt_system_prompt
-    else:
+    messages = _generate_messages(state)
+    if messages is None:
         return state
+    text = _call_llm(state, messages, TEMPERATURE, "Groq request failed", node="generate")
+    return state if text is None else _apply_generated(state, text)
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": LLM_MODEL,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        "temperature": TEMPERATURE
-    }
 
-    try:
-        resp = requests.post(GROQ_ENDPOINT, headers=headers, json=payload, timeout=15)
-        if resp.status_code == 200:
-            data = resp.json()
-            generated_text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            if generated_text and generated_text.strip():
-                state.context["sql"] = generated_text.strip()
-            else:
-                state.errors.append("Groq returned empty content.")
-        else:
-            state.errors.append(f"Groq API error: {resp.status_code}, {resp.text}")
-    except Exception as e:
-        state.errors.append(f"Groq request failed: {e}")
-
-    return state
+@traced("generate", as_type="generation")
+@track_node("generate")
+async def agenerate_node(state: AgentState) -> AgentState:
+    if _generate_locally(state):
+        return state
+    messages = _generate_messages(state)
+    if messages is None:
+        return state
+    text = await _acall_llm(state, messages, TEMPERATURE, "Groq request failed", node="generate")
+    return state if text is None else _apply_generated(state, text)
 
 
-@observe(name="plan")
+@traced("plan")
+@track_node("plan")
 def plan_node(state: AgentState) -> AgentState:
-    goal = state.goal.lower()
-    if any(k in goal for k in ["calc", "calculate", "expression"]):
-        state.tool = "calc"
-    elif any(k in goal for k in ["dbt", "sql2dbt", "convert sql", "model"]):
-        state.tool = "sql2dbt"
-    elif any(k in goal for k in ["search", "duckduckgo", "find"]):
-        state.tool = "search"
-    else:
-        state.tool = "search"
+    choice = route(state.goal)
+    state.tool = choice.tool
+    state.context["route"] = {"confidence": choice.confidence, "ranked": list(choice.ranked)}
+    candidates = _speculation_candidates(state, choice)
+    if candidates:
+        state.context["speculate"] = candidates
     return state
 
 
-@observe(name="interpret_math")
+@traced("interpret_math")
+@track_node("interpret_math")
 def interpret_math_node(state: AgentState) -> AgentState:
     """LLM pre-processing for calc tasks: extract arithmetic expression from natural language."""
-    if state.tool == "calc" and GROQ_API_KEY:
-        user_prompt = (
-            f"Extract only the arithmetic expression from this text: {state.goal}. "
-            "Return ONLY the expression, no explanation, no words."
-        )
-
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": LLM_MODEL,
-            "messages": [
-                {"role": "system", "content": "You are a math parser. Return only the arithmetic expression."},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0
-        }
+    if _interpret_locally(state):
+        return state
+    messages = _interpret_messages(state)
+    if messages is None:
+        return state
+    expression = _call_llm(state, messages, 0, "LLM interpretation failed")
+    return state if expression is None else _apply_expression(state, expression)
+
+
+@traced("interpret_math")
+@track_node("interpret_math")
+async def ainterpret_math_node(state: AgentState) -> AgentState:
+    if _interpret_locally(state):
+        return state
+    messages = _interpret_messages(state)
+    if messages is None:
+        return state
+    expression = await _acall_llm(state, messages, 0, "LLM interpretation failed")
+    return state if expression is None else _apply_expression(state, expression)
+
+
+def _begin_attempt(state: AgentState):
+    """Start one tool attempt: clear the previous result and mark where its errors begin."""
+    state.result = None
+    state.context["attempt_errors_from"] = len(state.errors)
 
-        try:
-            resp = requests.post(GROQ_ENDPOINT, headers=headers, json=payload, timeout=15)
-            if resp.status_code == 200:
-                data = resp.json()
-                expression = data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-                if expression:
-                    state.context["expression"] = expression
-                else:
-                    state.errors.append("LLM did not return an expression.")
-            else:
-                state.errors.append(f"Groq API error: {resp.status_code}, {resp.text}")
-        except Exception as e:
-            state.errors.append(f"LLM interpretation failed: {e}")
 
+def _end_attempt(state: AgentState) -> AgentState:
+    """Record the errors of this attempt for evaluate."""
+    state.context["attempt_errors"] = state.errors[state.context.pop("attempt_errors_from", len(state.errors)):]
     return state
 
 
-@observe(name="execute")
+@traced("execute")
+@track_node("execute")
 def execute_node(state: AgentState) -> AgentState:
-    if state.tool == "calc":
-        return calc_tool(state)
-    if state.tool == "sql2dbt":
-        return sql2dbt_tool(state)
-    if state.tool == "search":
-        return search_tool(state)
-    state.errors.append(f"Unknown tool: {state.tool}")
-    return state
+    spec = get_tool(state.tool)
+    if spec is None:
+        state.errors.append(f"Unknown tool: {state.tool}")
+        state.context["attempt_errors"] = state.errors[-1:]
+        return state
+    _begin_attempt(state)
+    return _end_attempt(spec.get_func()(state))
+
+
+@traced("execute")
+@track_node("execute")
+async def aexecute_node(state: AgentState) -> AgentState:
+    spec = get_tool(state.tool)
+    if spec is None:
+        state.errors.append(f"Unknown tool: {state.tool}")
+        state.context["attempt_errors"] = state.errors[-1:]
+        return state
+    _begin_attempt(state)
+    afunc = spec.get_afunc()
+    if afunc is None:
+        return _end_attempt(spec.get_func()(state))  # CPU-only tools (e.g. calc) run inline
+    return _end_attempt(await afunc(state))
 
 
-@observe(name="explain_calc")
+@traced("explain_calc")
+@track_node("explain_calc")
 def explain_calc_node(state: AgentState) -> AgentState:
-    if state.tool == "calc" and state.result:
-        original_prompt = state.goal
-        expression = state.result.get("expression")
-        value = state.result.get("value")
-
-        user_prompt = (
-            f"Original question: {original_prompt}\n"
-            f"Computed expression: {expression}\n"
-            f"Result: {value}\n\n"
-            "Respond to the original question in a helpful way. "
-            "Explain the steps clearly and include the final result."
-        )
-
-        headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
-        payload = {
-            "model": LLM_MODEL,
-            "messages": [
-                {"role": "system", "content": ("You are a helpful math assistant."
-                        "Use the expression and result to answer the original question clearly.")},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0
-        }
+    if _explain_locally(state):
+        return state
+    explanation = _call_llm(state, _explain_messages(state), 0, "LLM explanation failed", node="explain_calc")
+    return _apply_explanation(state, explanation)
 
-        try:
-            resp = requests.post(GROQ_ENDPOINT, headers=headers, json=payload, timeout=15)
-            if resp.status_code == 200:
-                data = resp.json()
-                explanation = data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-                if explanation:
-                    state.result["explanation"] = explanation
-            else:
-                state.errors.append(f"Groq API error: {resp.status_code}, {resp.text}")
-        except Exception as e:
-            state.errors.append(f"LLM explanation failed: {e}")
 
-    return state
+@traced("explain_calc")
+@track_node("explain_calc")
+async def aexplain_calc_node(state: AgentState) -> AgentState:
+    if _explain_locally(state):
+        return state
+    explanation = await _acall_llm(state, _explain_messages(state), 0, "LLM explanation failed", node="explain_calc")
+    return _apply_explanation(state, explanation)
 
 
-@observe(name="evaluate")
+@traced("evaluate")
+@track_node("evaluate")
 def evaluate_node(state: AgentState) -> AgentState:
-    if state.result and not state.errors:
+    # Judge only the latest tool attempt: earlier retries and LLM pre/post
+    # node errors (e.g. a failed explanation) do not fail a good result.
+    # Popped so the bookkeeping never reaches the returned state.
+    attempt_errors = state.context.pop("attempt_errors", [])
+    if state.result and not attempt_errors:
         state.tests_passed = True
         return state
+    if is_terminal(attempt_errors):
+        state.terminal = True
+        return state
 
     if state.tool == "calc" and state.errors:
         state.context["expression"] = (state.context.get("expression") or state.goal).replace(" ", "")
     elif state.tool == "search" and (not state.result or not state.result.get("snippets")):
         state.context["query"] = state.goal + " site:docs langgraph"
-    elif state.tool == "sql2dbt" and state.errors:
-        sql = state.context.get("sql") or state.goal
-        if not sql.strip().endswith(";"):
-            state.context["sql"] = sql.strip() + ";"
+    # sql2dbt retries unchanged: the generated model is reused and only the
+    # (transiently failed) write is repeated.
     return state
 
 
-@observe(name="decide")
+@traced("decide")
+@track_node("decide")
 def decide_node(state: AgentState) -> AgentState:
+    # The only place attempts are counted.
     state.attempts = (state.attempts or 0) + 1
     return state
 
+# ---------------------------
+# Speculative execution
+# ---------------------------
+
+_speculation_pool = None
+_speculation_lock = threading.Lock()
+
+
+def _get_speculation_pool() -> ThreadPoolExecutor:
+    global _speculation_pool
+    if _speculation_pool is None:
+        with _speculation_lock:
+            if _speculation_pool is None:
+                _speculation_pool = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculate")
+    return _speculation_pool
+
+
+def _speculation_candidates(state: AgentState, choice) -> list:
+    """
+    Tools to race when routing is ambiguous: the routed tool, then ranked and
+    registered speculative ones. Nothing is raced when the routed tool itself
+    is not speculative.
+    """
+    if not state.context.get("speculative", SPECULATIVE_ENABLED) or choice.confidence >= SPECULATIVE_CONFIDENCE:
+        return []
+    routed = get_tool(choice.tool)
+    if routed is None or not routed.speculative:
+        return []  # never run a side-effecting tool on a guess
+    candidates = [choice.tool]
+    for name in [name for name, _ in choice.ranked] + [spec.name for spec in list_tools()]:
+        spec = get_tool(name)
+        if name not in candidates and spec and spec.speculative:
+            candidates.append(name)
+    candidates = candidates[:SPECULATIVE_MAX_TOOLS]
+    return candidates if len(candidates) > 1 else []
+
+
+def _run_candidate(trial: AgentState) -> AgentState:
+    """One full attempt of trial.tool (pre node, execute, post node, evaluate) on a private state."""
+    spec = get_tool(trial.tool)
+    pre, post = (get_hook(name).get_func() if name else None for name in (spec.pre_node, spec.post_node))
+    for step in (pre, execute_node, post, evaluate_node):
+        if step is not None:
+            trial = step(trial)
+    return trial
+
+
+def _adopt(state: AgentState, trial: AgentState):
+    state.tool = trial.tool
+    state.code = trial.code
+    state.result = trial.result
+    state.errors.extend(trial.errors[len(state.errors):])
+    state.context.update(trial.context)
+    state.tests_passed = trial.tests_passed
+    state.terminal = trial.terminal
+
+
+@traced("speculate")
+@track_node("speculate")
+def speculate_node(state: AgentState) -> AgentState:
+    """
+    Race the candidate tools on a thread pool under one deadline and keep the
+    first attempt that passes evaluate. Queued losers are cancelled; running
+    ones finish in the background and are discarded. Without a winner the
+    routed tool's own attempt is adopted (waited for past the deadline if it
+    is already running); only if it never started or raised does the normal path run.
+    """
+    candidates = state.context.pop("speculate", [])
+    start = time.monotonic()
+    deadline = start + SPECULATIVE_DEADLINE
+    pool = _get_speculation_pool()
+    futures = {}
+    for tool in candidates:
+        trial = AgentState(goal=state.goal, tool=tool, attempts=state.attempts, max_attempts=state.max_attempts,
+                           errors=state.errors, context=copy.deepcopy(state.context))
+        # Each branch gets a copy of the contextvars (stream writer, trace sampling).
+        futures[pool.submit(contextvars.copy_context().run, _run_candidate, trial)] = tool
+
+    finished, winner, pending = {}, None, set(futures)
+    while pending and winner is None:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            try:
+                trial = future.result()
+            except Exception as e:
+                logger.warning(f"Speculative {futures[future]} attempt failed: {e}")
+                continue
+            finished[trial.tool] = trial
+            if winner is None and trial.tests_passed:
+                winner = trial
+    routed = next(future for future, tool in futures.items() if tool == state.tool)
+    for future in pending:
+        if future is not routed:
+            future.cancel()
+    if winner is None and routed in pending and not routed.cancel():
+        # Past the deadline the normal path would run the routed tool anyway:
+        # finish its in-flight attempt instead of starting a second copy.
+        try:
+            finished[state.tool] = routed.result()
+        except Exception as e:
+            logger.warning(f"Speculative {state.tool} attempt failed: {e}")
+
+    adopted = winner or finished.get(state.tool)
+    if adopted is not None:
+        _adopt(state, adopted)
+    state.context["speculation"] = {
+        "candidates": candidates,
+        "finished": list(finished),
+        "adopted": adopted.tool if adopted else None,
+        "seconds": round(time.monotonic() - start, 3),
+    }
+    return state
+
 # ---------------------------
 # Graph Setup
 # ---------------------------
 
-graph = StateGraph(AgentState)
-graph.add_node("plan", plan_node)
-graph.add_node("interpret_math", interpret_math_node)
-graph.add_node("generate", generate_node)
-graph.add_node("execute", execute_node)
-graph.add_node("explain_calc", explain_calc_node)
-graph.add_node("evaluate", evaluate_node)
-graph.add_node("decide", decide_node)
-
-graph.add_edge(START, "plan")
-graph.add_edge("plan", "interpret_math")
-graph.add_conditional_edges(
-    "interpret_math",
-    lambda state: "generate" if state.tool == "sql2dbt" else "execute"
-)
-graph.add_conditional_edges(
-    "execute",
-    lambda state: "explain_calc" if state.tool == "calc" else "evaluate"
-)
-graph.add_edge("explain_calc", "evaluate")
-graph.add_edge("generate", "execute")
-graph.add_edge("evaluate", "decide")
+def _pre_node(state: AgentState) -> str:
+    spec = get_tool(state.tool)
+    return (spec and spec.pre_node) or "execute"
 
-graph.add_conditional_edges(
-    "decide",
-    lambda state: END if (state.tests_passed or state.attempts >= state.max_attempts) else "execute"
-)
 
-app = graph.compile()
+def _after_plan(state: AgentState) -> str:
+    return "speculate" if state.context.get("speculate") else _pre_node(state)
+
+
+def _after_speculate(state: AgentState) -> str:
+    return "decide" if state.context["speculation"]["adopted"] else _pre_node(state)
+
+
+def _post_node(state: AgentState) -> str:
+    spec = get_tool(state.tool)
+    return (spec and spec.post_node) or "evaluate"
+
+
+def _should_stop(state: AgentState) -> bool:
+    spec = get_tool(state.tool)
+    max_attempts = min(state.max_attempts, spec.max_attempts) if spec else state.max_attempts
+    return state.tests_passed or state.terminal or state.attempts >= max_attempts
+
+
+def build_graph():
+    """The (uncompiled) StateGraph; imports langgraph on first call."""
+    from langgraph.graph import StateGraph, START, END
+    from langchain_core.runnables import RunnableLambda
+
+    def node(func, afunc=None, name=None):
+        # Nodes mutate and return the state; LangGraph only receives what changed.
+        if afunc is None:
+            return updates_only(func)
+        return RunnableLambda(updates_only(func), afunc=updates_only(afunc), name=name)
+
+    graph = StateGraph(AgentState)
+    graph.add_node("plan", node(plan_node))
+    # LLM/IO nodes carry an async twin so app.ainvoke never blocks the event loop
+    graph.add_node("execute", node(execute_node, aexecute_node, "execute"))
+    graph.add_node("evaluate", node(evaluate_node))
+    graph.add_node("decide", node(decide_node))
+    graph.add_node("speculate", node(speculate_node))
+
+    # Pre/post hooks come from the tool registry (register_hook + register_tool)
+    pre_nodes = sorted({spec.pre_node for spec in list_tools() if spec.pre_node})
+    post_nodes = sorted({spec.post_node for spec in list_tools() if spec.post_node})
+    for name in sorted(set(pre_nodes) | set(post_nodes)):
+        hook = get_hook(name)
+        graph.add_node(name, node(hook.get_func(), hook.get_afunc(), name))
+
+    graph.add_edge(START, "plan")
+    graph.add_conditional_edges("plan", _after_plan, pre_nodes + ["execute", "speculate"])
+    graph.add_conditional_edges("speculate", _after_speculate, pre_nodes + ["execute", "decide"])
+    for name in pre_nodes:
+        graph.add_edge(name, "execute")
+    graph.add_conditional_edges("execute", _post_node, post_nodes + ["evaluate"])
+    for name in post_nodes:
+        graph.add_edge(name, "evaluate")
+    graph.add_edge("evaluate", "decide")
+
+    graph.add_conditional_edges(
+        "decide",
+        lambda state: END if _should_stop(state) else "execute"
+    )
+    return graph
+
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app():
+    """The compiled graph, built once per process and shared by every caller and thread."""
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = build_graph().compile()
+                serve_from_config()
+    return _app
+
+
+_durable_app = None
+
+
+def get_durable_app():
+    """The same graph compiled with the SQLite checkpointer, for resumable runs (run(..., run_id=...))."""
+    global _durable_app
+    if _durable_app is None:
+        with _app_lock:
+            if _durable_app is None:
+                from utils.checkpoints import get_checkpoint_store
+                _durable_app = build_graph().compile(checkpointer=get_checkpoint_store().saver)
+                serve_from_config()
+    return _durable_app
+
+
+def __getattr__(name):
+    # `graph.app` keeps working but compiles lazily
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up(connect: bool = True) -> dict:
+    """
+    Pay cold-start costs before the first request: compile the graph,
+    import the tool modules and (optionally) open a Groq connection.
+    Returns the seconds spent per step.
+    """
+    timings = {}
+    start = time.perf_counter()
+    get_app()
+    timings["compile"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preload_tools()
+    timings["tools"] = time.perf_counter() - start
+
+    if connect and GROQ_API_KEY:
+        start = time.perf_counter()
+        get_client().warm_up()
+        timings["connect"] = time.perf_counter() - start
+    logger.info(f"Warm-up done: { {k: round(v, 3) for k, v in timings.items()} }")
+    return timings
+
+
+def warm_up_in_background(connect: bool = True) -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(connect,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
 
 # ---------------------------
 # Runner
 # ---------------------------
 
-def run(goal: str, user_id: str = None):
-    initial_state = {
+def _initial_state(goal: str, user_id: str = None) -> dict:
+    return {
         "goal": goal,
         "tool": None,
         "context": {"user_id": user_id} if user_id else {},
@@ -238,5 +601,88 @@ def run(goal: str, user_id: str = None):
         "attempts": 0,
         "max_attempts": 3
     }
-    out = app.invoke(initial_state)
+
+
+def run(goal: str, user_id: str = None, run_id: str = None):
+    """
+    Run a goal to completion. With a run_id every completed node is
+    checkpointed to SQLite: calling run() again with the same id resumes a
+    failed or interrupted run from its last completed node (a run that ended
+    with a retryable tool error is retried from the tool step), and returns
+    the stored state of a passed or terminally failed one without repeating
+    any LLM call.
+    """
+    if run_id is not None:
+        return _run_durable(goal, user_id, run_id)
+    with sampled_run():
+        out = get_app().invoke(_initial_state(goal, user_id))
     return out
+
+
+def _run_durable(goal: str, user_id: str, run_id: str):
+    from utils.checkpoints import get_checkpoint_store
+
+    app = get_durable_app()
+    store = get_checkpoint_store()
+    config = {"configurable": {"thread_id": run_id}}
+    snapshot = app.get_state(config)
+    if snapshot.values and snapshot.values.get("goal") != goal:
+        logger.warning(f"Run {run_id} belongs to another goal; starting it over")
+        store.delete(run_id)
+        snapshot = app.get_state(config)
+    store.touch(run_id, goal)
+    if snapshot.values and not snapshot.next:
+        values = snapshot.values
+        if values.get("tests_passed") or values.get("terminal"):
+            return values
+        # Tools catch their own failures (e.g. a model write error) into
+        # state.errors, so such a run ends like a finished one: re-enter it
+        # at the tool step with a fresh attempt budget.
+        spec = get_tool(values.get("tool"))
+        app.update_state(config, {"attempts": 0}, as_node=(spec and spec.pre_node) or "plan")
+        snapshot = app.get_state(config)
+    with sampled_run():
+        if snapshot.next:
+            logger.info(f"Resuming run {run_id} at {list(snapshot.next)}")
+            out = app.invoke(None, config)
+        else:
+            out = app.invoke(_initial_state(goal, user_id), config)
+    store.compact(run_id)
+    return out
+
+
+def run_stream(goal: str, user_id: str = None):
+    """
+    Generator over a run's progress, built on LangGraph streaming:
+      {"type": "node_start" | "node_end", "node": name}
+      {"type": "token", "node": name, "text": delta}   (LLM output as it arrives)
+      {"type": "final", "state": {...}}                 (same shape as run())
+    """
+    initial = _initial_state(goal, user_id)
+    initial["context"]["stream"] = True
+    final = None
+    with sampled_run():
+        for mode, chunk in get_app().stream(initial, stream_mode=["tasks", "custom", "values"]):
+            if mode == "custom":
+                yield chunk
+            elif mode == "tasks":
+                yield {"type": "node_end" if "result" in chunk else "node_start", "node": chunk["name"]}
+            else:
+                final = chunk
+    yield {"type": "final", "state": final}
+
+
+async def arun(goal: str, user_id: str = None):
+    """Async entry point: drives the same compiled app without blocking the loop."""
+    with sampled_run():
+        return await get_app().ainvoke(_initial_state(goal, user_id))
+
+
+async def abatch(goals, user_id: str = None, max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+    """
+    Run many goals on one event loop with at most `max_concurrency` in flight.
+    The batch shares one trace sampling decision.
+    """
+    inputs = [_initial_state(goal, user_id) for goal in goals]
+    with sampled_run():
+        return await get_app().abatch(inputs, config={"max_concurrency": max_concurrency})
@@ -0,0 +1,262 @@
+"""
+In-process metrics that work without Langfuse: counters and latency
+histograms for graph nodes and outbound Groq / search calls, exported as
+Prometheus text (GET /metrics) or a JSON snapshot (GET /metrics.json).
+
+Recording is a perf_counter delta, a bisect and a dict update under a
+per-metric lock, so it is cheap enough to leave on in the hot path.
+"""
+import asyncio
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import METRICS_PORT, METRICS_HOST
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Full-precision sample value ({:g} would turn 1234567 into 1.23457e+06)."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, k)), "value": v} for k, v in self._values.items()]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_label_str(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) keyed by label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket (non-cumulative) counts + overflow, then sum, count
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels) -> int:
+        series = self._values.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        out = []
+        for key, counts, total, count in items:
+            out.append({
+                "labels": dict(zip(self.labels, key)),
+                "count": count,
+                "sum": round(total, 6),
+                "avg": round(total / count, 6) if count else 0.0,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], _cumulative(counts))),
+            })
+        return out
+
+    def render(self) -> List[str]:
+        lines = []
+        for sample in self.samples():
+            key = [sample["labels"][n] for n in self.labels]
+            for bound, cum in sample["buckets"].items():
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cum}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_format_value(sample['sum'])}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {sample['count']}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    total, out = 0, []
+    for c in counts:
+        total += c
+        out.append(total)
+    return out
+
+
+_METRICS: Dict[str, object] = {}
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return _METRICS.setdefault(name, Counter(name, help, labels))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return _METRICS.setdefault(name, Histogram(name, help, labels, buckets))
+
+
+NODE_LATENCY = histogram("agent_node_duration_seconds", "Graph node wall time.", ("node",))
+NODE_RUNS = counter("agent_node_runs_total", "Graph node executions by outcome.", ("node", "outcome"))
+GROQ_LATENCY = histogram("groq_request_duration_seconds", "Groq HTTP request time (per attempt).", ("status",))
+GROQ_REQUESTS = counter("groq_requests_total", "Groq HTTP attempts by status code.", ("status",))
+GROQ_RETRIES = counter("groq_retries_total", "Groq attempts that were retried.", ("reason",))
+LLM_CACHE = counter("llm_cache_lookups_total", "LLM response cache lookups.", ("result",))
+SEARCH_LATENCY = histogram("search_backend_duration_seconds", "Search backend call time.", ("backend",))
+SEARCH_REQUESTS = counter("search_backend_requests_total", "Search backend calls by outcome.", ("backend", "outcome"))
+SEARCH_ABANDONED = counter(
+    "search_backend_abandoned_total", "Hedged search calls left running after the search returned.", ("backend",)
+)
+SEARCH_CACHE = counter("search_cache_lookups_total", "Search result cache lookups.", ("result",))
+SEARCH_INDEX = counter("search_index_lookups_total", "Local snippet index lookups (hit / miss / outage).", ("result",))
+
+
+def track_node(name: str):
+    """Decorator recording latency and outcome (ok / error) of a graph node, sync or async."""
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    NODE_LATENCY.observe(time.perf_counter() - start, name)
+                    NODE_RUNS.inc(name, outcome)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                NODE_LATENCY.observe(time.perf_counter() - start, name)
+                NODE_RUNS.inc(name, outcome)
+        return wrapper
+
+    return decorator
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in list(_METRICS.values()):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    return {name: metric.samples() for name, metric in list(_METRICS.items())}
+
+
+def reset():
+    for metric in list(_METRICS.values()):
+        metric.reset()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """Serve /metrics and /metrics.json from a daemon thread (once per process); port 0 picks a free port."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+
+def serve_from_config() -> Optional[ThreadingHTTPServer]:
+    """Start the endpoint when METRICS_PORT is set (> 0); a no-op otherwise."""
+    return start_http_server() if METRICS_PORT > 0 else None
@@ -1,27 +1,193 @@
-from langfuse import observe, langfuse_context
+"""
+Langfuse tracing with sampling and a non-blocking export path.
+
+- traced(name) wraps a function with Langfuse's @observe once, at import.
+  When tracing is off (no keys, TRACING_ENABLED=false or TRACE_SAMPLE_RATE=0)
+  it returns the function itself, and langfuse is never imported.
+- sampled_run() makes one keep/drop decision per graph run; unsampled runs
+  call the undecorated function.
+- Events and flushes go through a bounded queue drained by a daemon thread;
+  when the queue is full the item is dropped instead of blocking the caller.
+"""
+import atexit
+import contextvars
+import functools
+import inspect
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from config import (
+    LANGFUSE_PUBLIC_KEY,
+    LANGFUSE_SECRET_KEY,
+    TRACING_ENABLED,
+    TRACE_SAMPLE_RATE,
+    TRACE_QUEUE_SIZE,
+    TRACE_CAPTURE_IO,
+)
+from utils.logger import logger
+
+ENABLED = bool(TRACING_ENABLED and LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY and TRACE_SAMPLE_RATE > 0)
+
+_sampled: contextvars.ContextVar[Optional[bool]] = contextvars.ContextVar("trace_sampled", default=None)
+
+
+def _langfuse():
+    from langfuse import get_client
+    return get_client()
+
+
+def is_sampled() -> bool:
+    """Decision for the current run; outside sampled_run() each call is sampled independently."""
+    if not ENABLED:
+        return False
+    decision = _sampled.get()
+    if decision is None:
+        return random.random() < TRACE_SAMPLE_RATE
+    return decision
+
+
+@contextmanager
+def sampled_run():
+    """Scope one run's sampling decision (a ContextVar, so threads and tasks each get their own)."""
+    decision = ENABLED and random.random() < TRACE_SAMPLE_RATE
+    token = _sampled.set(decision)
+    try:
+        yield decision
+    finally:
+        try:
+            _sampled.reset(token)
+        except ValueError:
+            pass  # generator closed from another context (e.g. an abandoned run_stream)
+
+
+def traced(name: str, as_type: Optional[str] = None, **observe_kwargs) -> Callable:
+    """@observe(name=...) created once, applied only to sampled runs; identity when tracing is off."""
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+        from langfuse import observe
+        observe_kwargs.setdefault("capture_input", TRACE_CAPTURE_IO)
+        observe_kwargs.setdefault("capture_output", TRACE_CAPTURE_IO)
+        observed = observe(name=name, as_type=as_type, **observe_kwargs)(func)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if is_sampled():
+                    return await observed(*args, **kwargs)
+                return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if is_sampled():
+                return observed(*args, **kwargs)
+            return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class _Exporter:
+    """Single daemon thread draining a bounded queue of export callables."""
+
+    def __init__(self, maxsize: int):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._flush_pending = False
+        self.dropped = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def request_flush(self) -> bool:
+        """Queue a flush unless one is already waiting (flushes coalesce)."""
+        with self._lock:
+            if self._flush_pending:
+                return True
+            self._flush_pending = True
+        if not self.submit(self._flush):
+            with self._lock:
+                self._flush_pending = False
+            return False
+        return True
+
+    def drain(self, timeout: float = 5.0):
+        """Best-effort wait for queued work (used at interpreter exit)."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        try:
+            self._queue.put((done.set, (), {}), timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _flush(self):
+        with self._lock:
+            self._flush_pending = False
+        _langfuse().flush()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.drain)
+
+    def _run(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logger.debug(f"Trace export failed: {e}")
+
+
+exporter = _Exporter(TRACE_QUEUE_SIZE)
+
 
 def start_trace(name: str, user_id: str = None):
     """
-    Initialize a trace context for the current run.
-    In v3, traces are managed via langfuse_context.
+    Trace handle for the current run, or None when tracing is off / not sampled
+    (log_event and end_trace then return immediately).
     """
-    langfuse_context.update_current_trace(name=name, user_id=user_id)
-    return {"trace_id": langfuse_context.get_current_trace_id()}
+    if not is_sampled():
+        return None
+    client = _langfuse()
+    trace_id = client.get_current_trace_id() or client.create_trace_id()
+    return {"trace_id": trace_id, "name": name, "user_id": user_id}
+
 
 def log_event(trace_ctx, event_name: str, payload: dict):
-    """
-    Log an event as a span using @observe decorator.
-    """
-    @observe(name=event_name)
-    def _log(data):
-        return data
-    _log(payload)
+    """Queue an event on the trace; dropped (never blocking) if the export queue is full."""
+    if trace_ctx is None:
+        return
+    exporter.submit(
+        lambda: _langfuse().create_event(
+            trace_context={"trace_id": trace_ctx["trace_id"]},
+            name=event_name,
+            input=payload,
+            metadata={"trace": trace_ctx["name"], "user_id": trace_ctx["user_id"]},
+        )
+    )
+
 
 def end_trace(trace_ctx, final_payload: dict = None):
-    """
-    Update trace metadata before finishing.
-    No .end() in v3; just update context.
-    """
-    langfuse_context.update_current_trace(metadata={"final": final_payload or {}})
-    # Optional flush for short-lived apps like Streamlit:
-    langfuse_context.flush()
+    """Queue the final payload and a background flush; returns immediately."""
+    if trace_ctx is None:
+        return
+    log_event(trace_ctx, f"{trace_ctx['name']}:end", final_payload or {})
+    exporter.request_flush()
@@ -0,0 +1,290 @@
+"""
+Headless HTTP entry point for the agent graph (stdlib only).
+
+    POST /run          {"goal": "...", "user_id": "...", "timeout": 30}  -> final AgentState as JSON
+    POST /run/stream   same body -> NDJSON, one graph.run_stream event per line
+    GET  /health       liveness plus pool / queue occupancy
+    GET  /metrics      Prometheus text from monitoring.metrics
+
+Runs execute on a fixed worker pool. At most SERVER_WORKERS + SERVER_MAX_QUEUE
+requests are admitted; beyond that the server answers 503 with Retry-After
+so a load balancer can send the request elsewhere. A request that exceeds its
+timeout gets 504; its worker finishes the run in the background and keeps
+its admission slot until then, so timeouts cannot overload the pool.
+
+    python server.py --port 8080 --workers 8 --max-queue 32
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import graph
+from config import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_MAX_QUEUE, SERVER_TIMEOUT
+from monitoring.metrics import render_prometheus
+from utils.logger import logger
+
+MAX_BODY_BYTES = 1 << 20
+_DONE = object()
+
+
+class Overloaded(Exception):
+    """No admission slot left (workers busy and queue full)."""
+
+
+class AgentService:
+    """Worker pool plus admission control, independent of the HTTP layer."""
+
+    def __init__(self, workers: int = SERVER_WORKERS, max_queue: int = SERVER_MAX_QUEUE, timeout: float = SERVER_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.running = 0
+        self.rejected = 0
+
+    def _admit(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Overloaded()
+        with self._lock:
+            self.admitted += 1
+
+    def _release(self):
+        with self._lock:
+            self.admitted -= 1
+        self._slots.release()
+
+    def _submit(self, fn, *args):
+        self._admit()
+
+        def task():
+            with self._lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                self._release()
+
+        try:
+            future = self._executor.submit(task)
+        except RuntimeError:
+            self._release()
+            raise
+        # A future cancelled before it started never runs task(), so free its slot here.
+        future.add_done_callback(lambda f: f.cancelled() and self._release())
+        return future
+
+    def run(self, goal: str, user_id: Optional[str] = None, timeout: Optional[float] = None) -> dict:
+        """Final state of one run; raises Overloaded or concurrent.futures.TimeoutError."""
+        future = self._submit(graph.run, goal, user_id)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            future.cancel()  # frees the slot at once if it never left the queue
+            raise
+
+    def stream(self, goal: str, user_id: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Admit the run now (raising Overloaded) and return an iterator of its
+        run_stream events; the iterator raises TimeoutError past the deadline.
+        """
+        events: "queue.Queue" = queue.Queue()
+
+        def produce():
+            try:
+                for event in graph.run_stream(goal, user_id):
+                    events.put(event)
+            except Exception as e:
+                events.put({"type": "error", "error": str(e)})
+            finally:
+                events.put(_DONE)
+
+        future = self._submit(produce)
+        return self._drain(events, future, time.monotonic() + (timeout or self.timeout))
+
+    @staticmethod
+    def _drain(events: "queue.Queue", future, deadline: float):
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                event = events.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                future.cancel()
+                raise FutureTimeout()
+            if event is _DONE:
+                return
+            yield event
+
+    def health(self) -> dict:
+        with self._lock:
+            admitted, running, rejected = self.admitted, self.running, self.rejected
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "running": running,
+            "queued": admitted - running,
+            "max_queue": self.max_queue,
+            "rejected": rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _json_bytes(payload) -> bytes:
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+class AgentHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "aiagents"
+    service: AgentService = None  # set by make_server
+
+    def log_message(self, fmt, *args):
+        logger.debug(f"{self.address_string()} {fmt % args}")
+
+    def _send(self, status: int, payload, content_type: str = "application/json", headers: Optional[dict] = None):
+        body = payload if isinstance(payload, bytes) else _json_bytes(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _overloaded(self):
+        self._send(503, {"error": "server busy, retry later"}, headers={"Retry-After": "1"})
+
+    def _read_request(self) -> Optional[dict]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True  # the body's end is unknown
+            self._send(400, {"error": "Content-Length must be a non-negative integer"})
+            return None
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # the unread body would corrupt the next request
+            self._send(413, {"error": "request body too large"})
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "body must be JSON"})
+            return None
+        if not isinstance(body, dict) or not isinstance(body.get("goal"), str) or not body["goal"].strip():
+            self._send(400, {"error": "'goal' (non-empty string) is required"})
+            return None
+        timeout = body.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            self._send(400, {"error": "'timeout' must be a positive number of seconds"})
+            return None
+        return body
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/health":
+            self._send(200, self.service.health())
+        elif path == "/metrics":
+            self._send(200, render_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        if path not in ("/run", "/run/stream"):
+            self._send(404, {"error": "not found"})
+            return
+        body = self._read_request()
+        if body is None:
+            return
+        args = (body["goal"], body.get("user_id"), body.get("timeout"))
+        if path == "/run":
+            self._run(*args)
+        else:
+            self._stream(*args)
+
+    def _run(self, goal, user_id, timeout):
+        try:
+            out = self.service.run(goal, user_id, timeout)
+        except Overloaded:
+            self._overloaded()
+        except FutureTimeout:
+            self._send(504, {"error": "run timed out"})
+        except Exception as e:
+            logger.error(f"Run failed: {e}")
+            self._send(500, {"error": str(e)})
+        else:
+            self._send(200, out)
+
+    def _write_chunk(self, payload: dict):
+        data = _json_bytes(payload) + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, goal, user_id, timeout):
+        try:
+            events = self.service.stream(goal, user_id, timeout)
+        except Overloaded:
+            self._overloaded()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for event in events:
+                self._write_chunk(event)
+        except FutureTimeout:
+            self._write_chunk({"type": "error", "error": "run timed out"})
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(host: str = SERVER_HOST, port: int = SERVER_PORT, service: Optional[AgentService] = None) -> ThreadingHTTPServer:
+    """Bind the server (port 0 picks a free one); call serve_forever() or run it in a thread."""
+    handler = type("BoundAgentHandler", (AgentHandler,), {"service": service or AgentService()})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    httpd.service = handler.service
+    return httpd
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the agent graph over HTTP.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Concurrent graph runs.")
+    parser.add_argument("--max-queue", type=int, default=SERVER_MAX_QUEUE, help="Admitted runs waiting for a worker.")
+    parser.add_argument("--timeout", type=float, default=SERVER_TIMEOUT, help="Default per-request timeout (s).")
+    args = parser.parse_args(argv)
+
+    graph.warm_up()
+    httpd = make_server(args.host, args.port, AgentService(args.workers, args.max_queue, args.timeout))
+    logger.info(f"Agent server on http://{args.host}:{httpd.server_address[1]} "
+                f"(workers={args.workers}, max_queue={args.max_queue}, timeout={args.timeout}s)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        httpd.service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,16 @@ import os
 import html
 import re
 import streamlit as st
-from graph import run
+from graph import warm_up_in_background
+from streamlit_progress import run_with_progress
+
+# ---------------------------
+# One-time warm-up: Streamlit reruns this script on every interaction,
+# cache_resource keeps the compiled graph / Groq pool per server process
+# ---------------------------
+@st.cache_resource(show_spinner=False)
+def warm_up_once():
+    return warm_up_in_background()
 
 # ---------------------------
 # Small input sanitizer
@@ -20,6 +29,7 @@ def sanitize(text: str) -> str:
 # Page & Status
 # ---------------------------
 st.set_page_config(page_title="AI Agent", layout="centered")
+warm_up_once()  # after set_page_config, which must be the first Streamlit command
 st.title("AI Agent - Choose required tool: Calculator, SQL → dbt, Search")
 
 try:
@@ -37,7 +47,7 @@ with st.sidebar:
     st.write(f"Langfuse: {lf_status}")
     st.write(f"Groq: {groq_status}")
     st.markdown("---")
-    st.caption("• LangGraph orchestrates cyclic workflows\n• Langfuse monitors traces\n• Groq powers LLM nodes (interpret & explain)")
+    st.caption("• LangGraph orchestrates cyclic workflows\n• Langfuse monitors traces\n• Groq powers LLM nodes (interpret; explain when CALC_EXPLAIN_MODE=rich)")
 
 # ---------------------------
 # Task Selector
@@ -58,8 +68,7 @@ if task == "Calculator":
     if st.button("Run"):
         # For plan + interpret_math extract/clean expression
         goal = f"calc {sanitize(expression)}"
-        with st.spinner("Running calculator agent..."):
-            out = run(goal=goal, user_id=user_id or None)
+        out = run_with_progress(goal, user_id or None, "Running calculator agent...", task="calc")
 
         result = out.get("result") or {}
         errors = out.get("errors") or []
@@ -100,8 +109,7 @@ elif task == "SQL → dbt":
     model_name = st.text_input("Model name (optional)", value="generated_model")
     if st.button("Run"):
         goal = f"sql2dbt {sanitize(sql)}"
-        with st.spinner("Converting SQL → dbt model..."):
-            out = run(goal=goal, user_id=user_id or None)
+        out = run_with_progress(goal, user_id or None, "Converting SQL → dbt model...", task="sql2dbt")
 
         result = out.get("result") or {}
         errors = out.get("errors") or []
@@ -109,3 +117,5 @@ elif task == "SQL → dbt":
 
         st.subheader("Generated dbt Model")
         model_content = result.get("model_content") or context.get("sql")
+        if model_content:
+            st.code(model_content, language="sql")
@@ -0,0 +1,39 @@
+"""
+Rendering shared by the Streamlit apps.
+"""
+import streamlit as st
+
+from utils.jobs import get_job_manager
+
+
+def run_with_progress(goal: str, user_id: str = None, label: str = "Running agent...", task: str = None):
+    """
+    Submit the run to the shared background pool (identical in-flight runs are
+    joined, recent results come from the cross-session cache) and render its
+    events as they arrive: active node, streamed LLM tokens, final state.
+    """
+    job = get_job_manager().submit(goal, user_id=user_id, task=task)
+    st.session_state["job_id"] = job.id
+    status = st.status(label)
+    stream_box = st.empty()
+    buffer = ""
+    out = {}
+    seen = 0
+    done = False
+    while not done:
+        events, done = job.wait_events(seen)
+        seen += len(events)
+        for event in events:
+            if event["type"] == "node_start":
+                status.update(label=f"{label} ({event['node']})")
+            elif event["type"] == "token":
+                buffer += event["text"]
+                if event["node"] == "generate":  # dbt model text
+                    stream_box.code(buffer, language="sql")
+                else:
+                    stream_box.markdown(buffer)
+            elif event["type"] == "final":
+                out = event["state"] or {}
+    status.update(label="Done (cached)" if job.cached else "Done", state="complete")
+    stream_box.empty()
+    return out
@@ -1,10 +1,20 @@
 
 import os
 import streamlit as st
-from graph import run
+from graph import warm_up_in_background
+from streamlit_progress import run_with_progress
+
+# ---------------------------
+# One-time warm-up: Streamlit reruns this script on every interaction,
+# cache_resource keeps the compiled graph / Groq pool per server process
+# ---------------------------
+@st.cache_resource(show_spinner=False)
+def warm_up_once():
+    return warm_up_in_background()
 
 # Page config
 st.set_page_config(page_title="AI Agent", layout="centered")
+warm_up_once()  # after set_page_config, which must be the first Streamlit command
 st.title("AI Agent - Universal Prompt: calc, SQL→dbt, search")
 
 # Sidebar: Status (optional)
@@ -33,8 +43,7 @@ prompt = st.text_area(
 )
 
 if st.button("Run"):
-    with st.spinner("Processing your request..."):
-        out = run(goal=prompt, user_id=user_id or None)
+    out = run_with_progress(prompt, user_id or None, "Processing your request...")
 
     result = out.get("result") or {}
     errors = out.get("errors") or []
@@ -0,0 +1,45 @@
+import requests
+
+import graph
+from evaluation.benchmark import offline_services, percentiles, run_level
+from evaluation.fakes import FakeGroqServer
+
+
+def test_fake_groq_server_speaks_chat_completions():
+    with FakeGroqServer(latency=0) as server:
+        resp = requests.post(server.url, json={"messages": [
+            {"role": "system", "content": "You are a math parser."},
+            {"role": "user", "content": "add 2 + 3 please"},
+        ]}, timeout=5)
+    assert resp.json()["choices"][0]["message"]["content"] == "2 + 3"
+
+
+def test_fake_groq_server_error_rate():
+    with FakeGroqServer(latency=0, error_rate=1.0) as server:
+        resp = requests.post(server.url, json={"messages": []}, timeout=5)
+    assert resp.status_code == 429 and resp.headers["Retry-After"] == "0"
+
+
+def test_percentiles_nearest_rank():
+    stats = percentiles([i / 1000 for i in range(1, 101)])
+    assert stats == {"p50": 50.0, "p95": 95.0, "p99": 99.0, "count": 100}
+
+
+def test_run_level_offline(monkeypatch):
+    monkeypatch.setattr(graph, "GROQ_API_KEY", "bench")
+    workload = ["calc I bought {i} * 3 apples and then + 4 more", "find LangGraph docs {i}"]
+    with offline_services(llm_latency=0, search_latency=0) as server:
+        row = run_level(2, 4, workload)
+    assert row["success_rate"] == 1.0
+    assert {"plan", "interpret_math", "execute"} <= set(row["nodes_ms"])
+    assert server.requests >= 2
+
+
+def test_offline_services_cover_async_runs(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(graph, "GROQ_API_KEY", "bench")
+    with offline_services(llm_latency=0, search_latency=0) as server:
+        out = asyncio.run(graph.arun("calc I bought 5 * 3 apples and then + 4 more"))
+    assert out["result"]["value"] == 19
+    assert server.requests >= 1
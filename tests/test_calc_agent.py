@@ -1,3 +1,5 @@
+import pytest
+
 from utils.state import AgentState
 from tools.calc_agent import calc_tool
 
@@ -5,3 +7,41 @@ def test_calc_tool_basic():
     st = AgentState(goal="2+2", context={"expression": "2+2"})
     out = calc_tool(st)
     assert out.result["value"] == 4
+
+def test_parse_local_expression():
+    from tools.calc_agent import parse_local_expression
+    assert parse_local_expression("calc 2+3*5") == "2+3*5"
+    assert parse_local_expression("what is 12 percent of 250?") == "(12 / 100 * 250)"
+    assert parse_local_expression("calc 5 apples + 3") is None
+    assert parse_local_expression("calc 7") is None
+
+def test_calc_tool_percent_goal():
+    from tools.calc_agent import parse_local_expression
+    st = AgentState(goal="x", context={"expression": parse_local_expression("what is 12 percent of 250")})
+    assert calc_tool(st).result["value"] == 30
+
+def test_calc_tool_unary_minus():
+    st = AgentState(goal="x", context={"expression": "-3+1"})
+    assert calc_tool(st).result["value"] == -2
+
+def test_calc_batch_expressions_and_bindings():
+    from tools.calc_agent import calc_batch
+    out = calc_batch(["1+2", "x*2", "foo(1)"], {"x": 3})
+    assert [r.get("value") for r in out] == [3, 6, None]
+    assert out[2]["error"] == "Unsupported expression"
+    assert list(calc_batch("price*qty", {"price": [1, 2], "qty": [3, 4]})) == [3, 8]
+    assert calc_batch("a-b", [{"a": 5, "b": 1}, {"a": 1, "b": 5}]) == [4, -4]
+
+def test_explain_expression_lists_steps_in_evaluation_order():
+    from tools.calc_agent import explain_expression
+    text = explain_expression("(1 + 2) * -(4 - 6)")
+    assert text.splitlines()[2:5] == ["1. `1 + 2` = `3`", "2. `4 - 6` = `-2`", "3. `-(-2)` = `2`"]
+    assert text.endswith("**Result:** `(1 + 2) * -(4 - 6)` = **6**")
+    assert explain_expression("7 / 2") == "**Result:** `7 / 2` = **3.5**"
+
+def test_graph_explains_calc_locally(monkeypatch):
+    import graph
+    monkeypatch.setattr(graph, "_call_llm", lambda *a, **k: pytest.fail("explanation must not call the LLM"))
+    monkeypatch.setattr(graph, "CALC_EXPLAIN_MODE", "local")
+    state = graph.explain_calc_node(calc_tool(AgentState(goal="x", tool="calc", context={"expression": "2+3*5"})))
+    assert "`3 * 5` = `15`" in state.result["explanation"]
@@ -0,0 +1,83 @@
+import pytest
+
+import graph
+from utils import checkpoints
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = checkpoints.CheckpointStore(str(tmp_path / "checkpoints.sqlite"), ttl=3600, max_runs=2)
+    monkeypatch.setattr(checkpoints, "_store", store)
+    monkeypatch.setattr(graph, "_durable_app", None)
+    return store
+
+
+def test_failed_run_resumes_from_last_completed_node(store, monkeypatch):
+    calls = {"plan": 0, "execute": 0}
+    plan_node, execute_node = graph.plan_node, graph.execute_node
+
+    def counting_plan(state):
+        calls["plan"] += 1
+        return plan_node(state)
+
+    def flaky_execute(state):
+        calls["execute"] += 1
+        if calls["execute"] == 1:
+            raise OSError("disk full")
+        return execute_node(state)
+
+    monkeypatch.setattr(graph, "plan_node", counting_plan)
+    monkeypatch.setattr(graph, "execute_node", flaky_execute)
+
+    with pytest.raises(OSError):
+        graph.run("calc 1+1", run_id="r1")
+    out = graph.run("calc 1+1", run_id="r1")
+    assert out["result"]["value"] == 2
+    assert calls == {"plan": 1, "execute": 2}
+
+    # A finished run is answered from its checkpoint and compacted to one row.
+    assert graph.run("calc 1+1", run_id="r1")["result"]["value"] == 2
+    assert calls["execute"] == 2
+    assert store.stats()["checkpoints"] == 1
+
+
+def test_prune_keeps_most_recent_runs_and_drops_expired(store):
+    for i, goal in enumerate(["calc 1+1", "calc 2+2", "calc 3+3"]):
+        graph.run(goal, run_id=f"r{i}")
+    assert store.prune() == ["r0"]
+    assert store.stats()["runs"] == 2
+
+    store.ttl = 0
+    assert sorted(store.prune()) == ["r1", "r2"]
+    assert store.stats() == {"runs": 0, "checkpoints": 0, "writes": 0}
+
+
+def test_touch_prunes_periodically(store, monkeypatch):
+    monkeypatch.setattr(checkpoints, "_PRUNE_EVERY", 2)
+    for i in range(4):
+        graph.run(f"calc {i}+1", run_id=f"r{i}")
+        assert store.stats()["runs"] <= 3
+    assert store.stats()["runs"] == 2
+
+
+def test_caught_tool_error_resumes_at_tool_step(store, monkeypatch, tmp_path):
+    from tools import sql2dbt_agent
+
+    calls = {"write": 0}
+    write_model_file = sql2dbt_agent.write_model_file
+
+    def flaky_write(content, file_name=None):
+        calls["write"] += 1
+        if calls["write"] <= 3:
+            raise NotADirectoryError("[Errno 20] Not a directory: 'dbt_models'")
+        return write_model_file(content, file_name, folder=str(tmp_path))
+
+    monkeypatch.setattr(sql2dbt_agent, "write_model_file", flaky_write)
+
+    goal = "sql2dbt select id from orders"
+    failed = graph.run(goal, run_id="w1")
+    assert not failed["tests_passed"] and failed["result"] is None and calls["write"] == 3
+
+    out = graph.run(goal, run_id="w1")
+    assert out["tests_passed"] and out["result"]["model_path"].startswith(str(tmp_path))
+    assert calls["write"] == 4 and out["attempts"] == 1
@@ -0,0 +1,10 @@
+from utils.errors import classify_error, is_terminal, RETRYABLE, TERMINAL
+
+
+def test_classify_error():
+    assert classify_error("Unsupported expression") == TERMINAL
+    assert classify_error("Groq API error: 401, bad key") == TERMINAL
+    assert classify_error("Groq API error: 429, slow down") == RETRYABLE
+    assert classify_error("No search results") == RETRYABLE
+    assert classify_error("something odd") == RETRYABLE
+    assert is_terminal(["No search results", "division by zero"])
@@ -4,3 +4,62 @@ from graph import run
 def test_graph_run_calc():
     out = run("calc 1+1")
     assert out.result
+
+def test_graph_abatch_calc():
+    import asyncio
+    from graph import abatch
+    outs = asyncio.run(abatch(["calc 1+1", "calc 2*3"], max_concurrency=2))
+    assert [o["result"]["value"] for o in outs] == [2, 6]
+
+def test_graph_stops_on_terminal_error():
+    out = run("calc 5 apples")
+    assert out["terminal"] and out["attempts"] == 1
+
+def test_graph_state_has_no_attempt_bookkeeping():
+    for goal in ("calc 2*3", "calc 5 apples"):
+        context = run(goal)["context"]
+        assert not {"attempt_errors", "attempt_errors_from"} & set(context)
+
+def _slow_search(monkeypatch, delay, calls=None):
+    import dataclasses
+    import time
+    from tools import registry
+
+    def search(state):
+        if calls is not None:
+            calls.append(state.goal)
+        time.sleep(delay)
+        state.result = {"snippets": ["langgraph docs"]}
+        return state
+
+    spec = dataclasses.replace(registry.get_tool("search"), func=search, afunc=None)
+    monkeypatch.setitem(registry._TOOLS, "search", spec)
+
+def test_speculation_keeps_first_passing_tool(monkeypatch):
+    import graph
+    _slow_search(monkeypatch, 0.5)
+    monkeypatch.setattr(graph, "SPECULATIVE_ENABLED", True)
+    out = run("what is 2 plus 2")
+    assert out["tool"] == "calc" and out["result"]["value"] == 4
+    assert out["context"]["speculation"]["adopted"] == "calc"
+    assert out["context"]["speculation"]["seconds"] < 0.5
+
+def test_speculation_waits_for_routed_tool_after_deadline(monkeypatch):
+    import graph
+    calls = []
+    _slow_search(monkeypatch, 0.2, calls)
+    monkeypatch.setattr(graph, "SPECULATIVE_ENABLED", True)
+    monkeypatch.setattr(graph, "SPECULATIVE_DEADLINE", 0.05)
+    out = run("tell me about langgraph")
+    assert out["context"]["speculation"]["adopted"] == "search"
+    assert out["tool"] == "search" and out["tests_passed"]
+    assert calls == ["tell me about langgraph"]  # not run a second time by the normal path
+
+def test_speculation_skipped_when_routed_tool_is_not_speculative(monkeypatch):
+    import graph
+    from tools.registry import route
+    monkeypatch.setattr(graph, "SPECULATIVE_ENABLED", True)
+    choice = route("search dbt docs")
+    assert choice.tool == "sql2dbt" and choice.confidence < graph.SPECULATIVE_CONFIDENCE
+    state = graph.AgentState(goal="search dbt docs")
+    assert graph._speculation_candidates(state, choice) == []
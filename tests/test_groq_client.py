@@ -0,0 +1,129 @@
+import pytest
+from utils.groq_client import GroqClient, GroqAPIError, parse_content
+
+
+class _Resp:
+    def __init__(self, status_code, data=None, text="", headers=None):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = text
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+def test_parse_content_handles_missing_fields():
+    assert parse_content({}) == ""
+    assert parse_content({"choices": [{"message": {"content": " 2+2 \n"}}]}) == "2+2"
+
+
+def test_chat_reuses_session_and_raises_on_error(monkeypatch):
+    client = GroqClient(api_key="k", endpoint="http://local/chat", model="m", max_retries=0)
+    calls = []
+
+    def fake_post(url, json=None, timeout=None, stream=False):
+        calls.append(json)
+        if len(calls) == 1:
+            return _Resp(200, {"choices": [{"message": {"content": "ok"}}]})
+        return _Resp(500, text="boom")
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+    assert client.chat([{"role": "user", "content": "hi"}], temperature=0) == "ok"
+    assert calls[0]["model"] == "m" and calls[0]["temperature"] == 0
+    with pytest.raises(GroqAPIError) as exc:
+        client.chat([{"role": "user", "content": "hi"}])
+    assert str(exc.value) == "Groq API error: 500, boom"
+
+
+def test_chat_stream_parses_sse(monkeypatch):
+    client = GroqClient(api_key="k", endpoint="http://local/chat", model="m")
+    lines = [
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        "",
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+        'data: {"choices": [{"delta": {"content": "lo"}}]}',
+        "data: [DONE]",
+    ]
+
+    class _StreamResp(_Resp):
+        def iter_lines(self, decode_unicode=False):
+            return iter(lines)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(client.session, "post", lambda url, **kw: _StreamResp(200))
+    assert list(client.chat_stream([{"role": "user", "content": "hi"}])) == ["Hel", "lo"]
+
+
+def test_chat_retries_429_honouring_retry_after(monkeypatch):
+    from utils import groq_client
+    from utils.rate_limit import RateLimiter
+
+    limiter = RateLimiter(rpm=600, tpm=0)
+    client = GroqClient(api_key="k", endpoint="http://local/chat", model="m", limiter=limiter, max_retries=2)
+    responses = [
+        _Resp(429, text="slow down", headers={"Retry-After": "0.01"}),
+        _Resp(503, text="busy"),
+        _Resp(200, {"choices": [{"message": {"content": "ok"}}]}),
+    ]
+    sleeps = []
+    monkeypatch.setattr(client.session, "post", lambda url, **kw: responses.pop(0))
+    monkeypatch.setattr(groq_client.time, "sleep", sleeps.append)
+    assert client.chat([{"role": "user", "content": "hi"}]) == "ok"
+    assert len(sleeps) == 2 and 0.01 <= sleeps[0] <= 0.01 + groq_client.GROQ_BACKOFF_BASE
+
+
+def test_async_client_is_closed_with_its_loop():
+    import asyncio
+    from utils import groq_client
+
+    async def open_client():
+        return groq_client.get_async_client()
+
+    async def reopen():
+        first = groq_client.get_async_client()
+        await groq_client.aclose_async_client()
+        return first, groq_client.get_async_client()
+
+    assert asyncio.run(open_client()).client.is_closed
+    first, second = asyncio.run(reopen())
+    assert first.client.is_closed and second is not first and second.client.is_closed
+
+
+def test_async_client_keeps_sqlite_off_the_event_loop(tmp_path):
+    import asyncio
+    import threading
+    from evaluation.fakes import FakeGroqServer
+    from utils.groq_client import AsyncGroqClient
+    from utils.llm_cache import LLMCache
+
+    cache = LLMCache(path=str(tmp_path / "llm.sqlite"))
+    sqlite_threads = []
+    execute = cache._db.execute
+    cache._db = type("Db", (), {
+        "execute": lambda self, *a: sqlite_threads.append(threading.current_thread()) or execute(*a),
+        "commit": lambda self: None,
+    })()
+    messages = [{"role": "system", "content": "You are a math parser."}, {"role": "user", "content": "1 + 2"}]
+
+    async def main():
+        client = AsyncGroqClient(api_key="k", endpoint=server.url, cache=cache)
+        first = await client.chat(messages)
+        cache._memory.clear()
+        second = await client.chat(messages)  # disk hit
+        await client.aclose()
+        return first, second, threading.current_thread()
+
+    with FakeGroqServer(latency=0) as server:
+        first, second, loop_thread = asyncio.run(main())
+    assert first == second == "1 + 2"
+    assert cache.stats()["disk_hits"] == 1
+    assert sqlite_threads and loop_thread not in sqlite_threads
@@ -0,0 +1,61 @@
+import threading
+
+from utils import jobs
+
+
+def _manager(monkeypatch, calls, gate=None):
+    def fake_run_stream(goal, user_id=None):
+        calls.append(goal)
+        if gate is not None:
+            gate.wait(5)
+        yield {"type": "node_start", "node": "execute"}
+        yield {"type": "final", "state": {"goal": goal, "tests_passed": True}}
+
+    monkeypatch.setattr("graph.run_stream", fake_run_stream)
+    return jobs.JobManager(workers=2, ttl=60, max_entries=16)
+
+
+def test_identical_prompts_share_one_run_and_then_hit_cache(monkeypatch):
+    calls = []
+    gate = threading.Event()
+    manager = _manager(monkeypatch, calls, gate)
+    first = manager.submit("calc 2+3", task="calc")
+    second = manager.submit("  CALC   2+3 ", task="calc")
+    assert second is first
+    gate.set()
+    assert first.wait(5) and first.result["tests_passed"]
+
+    third = manager.submit("calc 2+3", task="calc")
+    assert third.cached and third.done and third.result == first.result
+    assert calls == ["calc 2+3"]
+
+
+def test_wait_events_polls_incrementally(monkeypatch):
+    manager = _manager(monkeypatch, [])
+    job = manager.submit("find docs", task="search")
+    seen, done = 0, False
+    types = []
+    while not done:
+        events, done = job.wait_events(seen, timeout=1)
+        seen += len(events)
+        types += [e["type"] for e in events]
+    assert types == ["node_start", "final"]
+    assert manager.get(job.id) is job
+
+
+def test_job_key_keeps_sql_case_and_separates_users():
+    key = jobs.JobManager.job_key
+    assert key("  CALC   2+3 ", "calc") == key("calc 2+3", "calc")
+    sql = "convert sql to dbt: select * from people where name = '{}'"
+    assert key(sql.format("Bob"), "sql2dbt") != key(sql.format("bob"), "sql2dbt")
+    assert key("calc 2+3", "calc", "alice") != key("calc 2+3", "calc", "bob")
+
+
+def test_sql2dbt_results_are_not_cached(monkeypatch):
+    calls = []
+    manager = _manager(monkeypatch, calls)
+    goal = "convert sql to dbt: select id from orders"
+    assert manager.submit(goal, task="sql2dbt").wait(5)
+    second = manager.submit(goal, task="sql2dbt")
+    assert second.wait(5) and not second.cached
+    assert calls == [goal, goal]
@@ -0,0 +1,28 @@
+import time
+from utils.llm_cache import LLMCache, make_key
+
+
+def test_make_key_is_content_addressed():
+    msgs = [{"role": "user", "content": "2+2"}]
+    assert make_key("m", msgs, 0) == make_key("m", [dict(msgs[0])], 0.0)
+    assert make_key("m", msgs, 0) != make_key("m", msgs, 0.2)
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    LLMCache(path=path).set("k", "v")
+    cache = LLMCache(path=path)
+    assert cache.get("k") == "v"
+    assert cache.get("k") == "v"
+    assert cache.stats()["disk_hits"] == 1 and cache.stats()["memory_hits"] == 1
+
+
+def test_ttl_and_lru_eviction():
+    cache = LLMCache(path=None, ttl=0.05, max_memory=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.set("c", "3")
+    assert cache.get("a") is None
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    assert cache.stats()["misses"] == 2
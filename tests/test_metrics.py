@@ -0,0 +1,57 @@
+import json
+import urllib.request
+
+from evaluation.fakes import FakeGroqServer
+from monitoring import metrics
+from utils.groq_client import GroqClient
+
+
+def test_histogram_buckets_and_prometheus_text():
+    hist = metrics.Histogram("t_seconds", "test", ("node",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, "plan")
+    sample = hist.samples()[0]
+    assert sample["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+    assert sample["count"] == 4
+    assert 't_seconds_bucket{node="plan",le="1.0"} 3' in hist.render()
+
+
+def test_large_and_fractional_values_render_at_full_precision():
+    counter = metrics.Counter("t_total", "test")
+    counter.inc(amount=1234567)
+    hist = metrics.Histogram("t_seconds", "test", buckets=(1.0,))
+    hist.observe(1234567.125)
+    assert counter.render() == ["t_total 1234567"]
+    assert "t_seconds_sum 1234567.125" in hist.render()
+
+
+def test_track_node_counts_errors():
+    @metrics.track_node("t_boom")
+    def boom(state):
+        raise ValueError("x")
+
+    before = metrics.NODE_RUNS.value("t_boom", "error")
+    try:
+        boom(None)
+    except ValueError:
+        pass
+    assert metrics.NODE_RUNS.value("t_boom", "error") == before + 1
+    assert metrics.NODE_LATENCY.count("t_boom") >= 1
+
+
+def test_groq_calls_are_counted_and_exposed_over_http():
+    with FakeGroqServer(latency=0, error_rate=1.0) as server:
+        client = GroqClient(api_key="k", endpoint=server.url, max_retries=1)
+        before = metrics.GROQ_RETRIES.value("429")
+        try:
+            client.chat([{"role": "user", "content": "hi"}], use_cache=False)
+        except Exception:
+            pass
+    assert metrics.GROQ_RETRIES.value("429") == before + 1
+
+    httpd = metrics.start_http_server(port=0)
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    text = urllib.request.urlopen(f"{base}/metrics", timeout=5).read().decode()
+    assert '# TYPE groq_requests_total counter' in text and 'groq_requests_total{status="429"}' in text
+    snap = json.loads(urllib.request.urlopen(f"{base}/metrics.json", timeout=5).read())
+    assert "agent_node_duration_seconds" in snap
@@ -0,0 +1,39 @@
+import threading
+import time
+
+from monitoring import monitor
+
+
+def test_traced_is_identity_when_tracing_disabled(monkeypatch):
+    monkeypatch.setattr(monitor, "ENABLED", False)
+
+    def node(state):
+        return state
+
+    assert monitor.traced("plan")(node) is node
+    assert monitor.start_trace("run") is None
+    monitor.log_event(None, "ignored", {})
+
+
+def test_sampled_run_scopes_decision(monkeypatch):
+    monkeypatch.setattr(monitor, "ENABLED", True)
+    monkeypatch.setattr(monitor, "TRACE_SAMPLE_RATE", 0.0)
+    with monitor.sampled_run() as decision:
+        assert decision is False and monitor.is_sampled() is False
+    monkeypatch.setattr(monitor, "TRACE_SAMPLE_RATE", 1.0)
+    with monitor.sampled_run():
+        assert monitor.is_sampled() is True
+
+
+def test_exporter_drops_instead_of_blocking():
+    exporter = monitor._Exporter(maxsize=2)
+    release = threading.Event()
+    exporter.submit(release.wait)
+    time.sleep(0.05)            # worker is now stuck on release.wait
+    start = time.perf_counter()
+    accepted = [exporter.submit(lambda: None) for _ in range(5)]
+    assert time.perf_counter() - start < 0.05
+    assert accepted == [True, True, False, False, False]
+    assert exporter.dropped == 3
+    release.set()
+    exporter.drain(timeout=1)
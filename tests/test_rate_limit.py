@@ -0,0 +1,18 @@
+import pytest
+from utils.rate_limit import RateLimiter, RateLimitShed
+
+
+def test_limiter_sheds_when_wait_exceeds_budget():
+    limiter = RateLimiter(rpm=60, tpm=0, max_queue=10, max_wait=0.5)
+    for _ in range(60):         # full one-minute burst
+        limiter.acquire()
+    with pytest.raises(RateLimitShed):
+        limiter.acquire()       # next slot is ~1s away > max_wait
+    assert limiter.shed == 1
+
+
+def test_limiter_sheds_when_queue_full():
+    limiter = RateLimiter(rpm=1, tpm=0, max_queue=0, max_wait=120)
+    limiter.acquire()
+    with pytest.raises(RateLimitShed):
+        limiter.acquire()
@@ -0,0 +1,61 @@
+import pytest
+
+from tools.registry import HookNode, Router, ToolSpec, register_hook, register_tool, route
+
+
+def test_builtin_routing_matches_keywords():
+    assert route("calc 1+1").tool == "calc"
+    assert route("sql2dbt SELECT 1").tool == "sql2dbt"
+    assert route("find LangGraph docs").tool == "search"
+    choice = route("tell me a joke")
+    assert choice.tool == "search" and choice.confidence == 0.0
+
+
+def test_router_scores_and_prefers_longest_trigger():
+    specs = [
+        ToolSpec(name="a", func=None, triggers=("calc",)),
+        ToolSpec(name="b", func=None, triggers=("calculator", "widget")),
+    ]
+    choice = Router(specs, default="a").route("calculator widget")
+    assert choice.tool == "b" and choice.score == 2.0 and choice.confidence == 1.0
+
+
+def test_tools_are_imported_lazily():
+    import subprocess
+    import sys
+    code = (
+        "import sys, graph; "
+        "assert 'tools.sql2dbt_agent' not in sys.modules and 'langgraph.graph' not in sys.modules; "
+        "from tools.registry import get_tool; "
+        "from tools.calc_agent import calc_tool; "
+        "assert get_tool('calc').get_func() is calc_tool"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_register_tool_rejects_unknown_hook_nodes():
+    with pytest.raises(ValueError, match="unknown hook node 'summarize'"):
+        register_tool(ToolSpec(name="t_bad", func=None, post_node="summarize"))
+    with pytest.raises(ValueError, match="built-in graph node"):
+        register_hook(HookNode("execute", func=None))
+
+
+def test_custom_hook_node_runs_in_graph(monkeypatch):
+    import graph
+    from tools import registry
+
+    def tool(state):
+        state.result = {"value": state.context["prepared"]}
+        return state
+
+    def prepare(state):
+        state.context["prepared"] = state.goal.upper()
+        return state
+
+    monkeypatch.setattr(registry, "_HOOKS", dict(registry._HOOKS))
+    monkeypatch.setattr(registry, "_TOOLS", dict(registry._TOOLS))
+    monkeypatch.setattr(registry, "_router", None)
+    monkeypatch.setattr(graph, "_app", None)
+    register_hook(HookNode("t_prepare", prepare))
+    register_tool(ToolSpec(name="t_shout", func=tool, triggers=("shout",), pre_node="t_prepare"))
+    assert graph.run("shout hi")["result"] == {"value": "SHOUT HI"}
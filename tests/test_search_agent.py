@@ -0,0 +1,112 @@
+import threading
+import time
+from tools import search_agent
+from utils.state import AgentState
+
+
+def test_search_cache_normalizes_and_dedupes_inflight(monkeypatch):
+    calls = []
+
+    def fake_search(query, max_results=5, region="wt-wt"):
+        calls.append(query)
+        time.sleep(0.05)
+        return [{"title": "t", "link": "l", "snippet": query}]
+
+    monkeypatch.setattr(search_agent, "_search_duckduckgo", fake_search)
+    search_agent._search_cache.clear()
+
+    threads = [threading.Thread(target=search_agent.cached_search, args=("LangGraph  docs",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out = search_agent.search_tool(AgentState(goal="  langgraph DOCS "))
+    assert len(calls) == 1
+    assert out.result["snippets"][0]["snippet"] == "LangGraph  docs"
+
+
+def test_search_cache_skips_empty_results(monkeypatch):
+    calls = []
+    monkeypatch.setattr(search_agent, "_search_duckduckgo", lambda q, m=5, r="wt-wt": calls.append(q) or [])
+    search_agent._search_cache.clear()
+    search_agent.cached_search("nothing")
+    search_agent.cached_search("nothing")
+    assert len(calls) == 2
+
+
+def test_hedged_search_returns_fast_backend(monkeypatch):
+    def slow(query, max_results=5, region="wt-wt"):
+        time.sleep(1)
+        return [{"title": "slow", "link": "#", "snippet": ""}]
+
+    def fast(query, max_results=5, region="wt-wt"):
+        return [{"title": "fast", "link": "#", "snippet": ""}]
+
+    monkeypatch.setattr(search_agent, "SEARCH_BACKENDS", {"slow": slow, "fast": fast})
+    start = time.monotonic()
+    out = search_agent._search_hedged("q", deadline=2, hedge_delay=0.05)
+    assert out[0]["title"] == "fast"
+    assert time.monotonic() - start < 0.5
+
+
+def test_hedged_search_runs_hedges_on_own_pool_and_counts_abandoned(monkeypatch):
+    import threading
+    from monitoring.metrics import SEARCH_ABANDONED
+
+    threads = {}
+
+    def slow(query, max_results=5, region="wt-wt"):
+        threads["slow"] = threading.current_thread().name
+        time.sleep(0.3)
+        return []
+
+    def fast(query, max_results=5, region="wt-wt"):
+        threads["fast"] = threading.current_thread().name
+        return [{"title": "fast", "link": "#", "snippet": ""}]
+
+    monkeypatch.setattr(search_agent, "SEARCH_BACKENDS", {"t_slow": slow, "t_fast": fast})
+    before = SEARCH_ABANDONED.value("t_slow")
+    assert search_agent._search_hedged("q", deadline=2, hedge_delay=0.05)[0]["title"] == "fast"
+    assert threads["slow"].startswith("search_") and threads["fast"].startswith("search-hedge")
+    assert SEARCH_ABANDONED.value("t_slow") == before + 1
+
+
+def test_hedged_search_respects_deadline(monkeypatch):
+    def hang(query, max_results=5, region="wt-wt"):
+        time.sleep(0.5)
+        return [{"title": "late", "link": "#", "snippet": ""}]
+
+    monkeypatch.setattr(search_agent, "SEARCH_BACKENDS", {"hang": hang})
+    start = time.monotonic()
+    assert search_agent._search_hedged("q", deadline=0.1, hedge_delay=0.05) == []
+    assert time.monotonic() - start < 0.4
+
+
+def test_refine_results_dedupes_ranks_and_stops_early():
+    from tools.search_ranking import canonical_url, refine_results
+
+    assert canonical_url("https://www.Example.com/docs/?utm_source=x&b=2&a=1#top") == "example.com/docs?a=1&b=2"
+    consumed = []
+
+    def hits():
+        for hit in [
+            {"title": "Cooking", "link": "https://food.example/pasta", "snippet": "How to boil pasta at home"},
+            {"title": "LangGraph", "link": "https://langchain.com/langgraph", "snippet": "LangGraph builds stateful agent graphs"},
+            {"title": "LangGraph", "link": "http://www.langchain.com/langgraph/?utm_medium=ad", "snippet": "other text"},
+            {"title": "Mirror", "link": "https://mirror.example/lg", "snippet": "LangGraph builds stateful agent graphs!"},
+            {"title": "Ключ", "link": "https://ru.example/lg", "snippet": "Документация LangGraph"},
+            {"title": "Docs", "link": "https://docs.example/langgraph", "snippet": "LangGraph docs and agent tutorials"},
+            {"title": "Never read", "link": "https://late.example", "snippet": "langgraph"},
+        ]:
+            consumed.append(hit["link"])
+            yield hit
+
+    out = refine_results(hits(), "langgraph agent docs", max_results=3)
+    assert [h["link"] for h in out] == ["https://docs.example/langgraph", "https://langchain.com/langgraph"]
+    assert "https://late.example" not in consumed
+
+
+def test_refine_results_falls_back_to_non_ascii():
+    from tools.search_ranking import refine_results
+    hits = [{"title": "t", "link": "https://ru.example", "snippet": "Документация"}]
+    assert refine_results(iter(hits), "docs", max_results=5) == hits
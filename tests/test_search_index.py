@@ -0,0 +1,60 @@
+import time
+
+from tools import search_agent, search_index
+from tools.search_index import SnippetIndex, get_search_index, set_search_index
+
+HITS = [
+    {"title": "LangGraph docs", "link": "https://langchain.com/langgraph", "snippet": "Build stateful agents with LangGraph"},
+    {"title": "LangGraph tutorial", "link": "https://blog.example/lg", "snippet": "A LangGraph agent tutorial with graphs"},
+    {"title": "LangGraph API", "link": "https://api.example/langgraph", "snippet": "LangGraph reference for StateGraph"},
+]
+
+
+def test_lookup_serves_fresh_related_matches_only():
+    index = SnippetIndex(":memory:", freshness=60, min_match=0.8, min_hits=2)
+    index.add("langgraph docs", HITS)
+    index.add("langgraph docs", HITS[:1])  # upsert, no duplicate row
+    assert index.size() == 3
+
+    assert len(index.lookup("LangGraph docs site:docs", max_results=5)) == 3
+    assert index.lookup("pasta recipes", max_results=5) == []
+    assert index.lookup("langgraph pasta recipes", max_results=5) == []  # too few terms matched
+
+    index.freshness = 0
+    time.sleep(0.01)
+    assert index.lookup("langgraph docs", max_results=5) == []
+    assert len(index.lookup("langgraph docs", max_results=5, fresh_only=False)) == 3
+
+
+def test_eviction_keeps_most_recently_used():
+    index = SnippetIndex(":memory:", max_entries=2)
+    index.add("q", HITS)
+    index._evict(time.time())
+    assert index.size() == 2
+
+
+def test_search_uses_index_before_network_and_during_outages(monkeypatch):
+    calls = []
+
+    def backend(query, max_results=5, region="wt-wt"):
+        calls.append(query)
+        return list(HITS) if len(calls) == 1 else []
+
+    monkeypatch.setattr(search_agent, "SEARCH_BACKENDS", {"fake": backend})
+    monkeypatch.setattr(search_index, "_index", SnippetIndex(":memory:", min_hits=2))
+    assert len(search_agent._search_duckduckgo("langgraph agents")) == 3
+    assert len(search_agent._search_duckduckgo("agents for LangGraph")) == 3
+    assert calls == ["langgraph agents"]
+
+    stale = SnippetIndex(":memory:", freshness=0, min_hits=2)
+    stale.add("langgraph agents", HITS)
+    monkeypatch.setattr(search_index, "_index", stale)
+    assert search_agent._search_duckduckgo("langgraph agents") and len(calls) == 2
+
+
+def test_restoring_an_unopened_index_keeps_it_lazy(monkeypatch):
+    monkeypatch.setattr(search_index, "_index", search_index._UNSET)
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_ENABLED", True)
+    monkeypatch.setattr(search_index, "SnippetIndex", lambda: "opened")
+    set_search_index(set_search_index(None))
+    assert get_search_index() == "opened"
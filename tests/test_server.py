@@ -0,0 +1,72 @@
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import graph
+import server
+from evaluation.benchmark import offline_services
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    monkeypatch.setattr(graph, "GROQ_API_KEY", "fake")
+    started = []
+
+    def start(**service_kwargs):
+        httpd = server.make_server("127.0.0.1", 0, server.AgentService(**service_kwargs))
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        started.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    with offline_services(llm_latency=0, search_latency=0):
+        yield start
+    for httpd in started:
+        httpd.shutdown()
+        httpd.service.shutdown()
+
+
+def _post(url, body, timeout=10):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def test_run_health_and_stream(serve):
+    base = serve(workers=2, max_queue=2, timeout=10)
+    out = json.loads(_post(f"{base}/run", {"goal": "calc 2+3*5"}).read())
+    assert out["tests_passed"] and out["result"]["value"] == 17
+
+    lines = _post(f"{base}/run/stream", {"goal": "calc 2+3*5"}).read().decode().splitlines()
+    events = [json.loads(line) for line in lines]
+    assert events[0]["type"] == "node_start" and events[-1]["type"] == "final"
+
+    health = json.loads(urllib.request.urlopen(f"{base}/health", timeout=5).read())
+    assert health["status"] == "ok" and health["workers"] == 2
+
+
+def test_bad_request_and_backpressure(serve, monkeypatch):
+    base = serve(workers=1, max_queue=0, timeout=0.2)
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _post(f"{base}/run", {"user_id": "x"})
+    assert err.value.code == 400
+
+    for length in ("abc", "-5"):
+        conn = http.client.HTTPConnection(base[len("http://"):], timeout=5)
+        conn.putrequest("POST", "/run")
+        conn.putheader("Content-Length", length)
+        conn.endheaders()
+        assert conn.getresponse().status == 400
+        conn.close()
+
+    release = threading.Event()
+    monkeypatch.setattr(graph, "run", lambda goal, user_id=None: release.wait(5) and {"goal": goal})
+    with pytest.raises(urllib.error.HTTPError) as slow:
+        _post(f"{base}/run", {"goal": "slow"})
+    assert slow.value.code == 504            # timed out; the run still holds the only slot
+    with pytest.raises(urllib.error.HTTPError) as busy:
+        _post(f"{base}/run", {"goal": "next"})
+    assert busy.value.code == 503 and busy.value.headers["Retry-After"] == "1"
+    release.set()
@@ -7,3 +7,74 @@ def test_sql2dbt_tool_creates_file(tmp_path, monkeypatch):
     st = AgentState(goal="SELECT 42 as answer", context={"sql": "SELECT 42 as answer", "model_name": "answer_model"})
     out = sql2dbt_tool(st)
     assert out.result and "model_path" in out.result
+
+def test_bulk_conversion_is_incremental(tmp_path):
+    import os
+    from tools.sql2dbt_bulk import convert_directory
+    src, out = tmp_path / "sql", tmp_path / "models"
+    (src / "marts").mkdir(parents=True)
+    (src / "orders.sql").write_text("SELECT * FROM orders")
+    (src / "marts" / "Daily Revenue.sql").write_text("SELECT 1 AS revenue")
+
+    first = convert_directory(str(src), str(out), workers=2)
+    assert sorted(first["converted"]) == ["marts/Daily Revenue.sql", "orders.sql"]
+    model = out / "marts" / "daily_revenue.sql"
+    mtime = os.stat(model).st_mtime_ns
+
+    (src / "orders.sql").write_text("SELECT id FROM orders")
+    second = convert_directory(str(src), str(out), workers=2)
+    assert second["converted"] == ["orders.sql"]
+    assert second["skipped"] == ["marts/Daily Revenue.sql"]
+    assert os.stat(model).st_mtime_ns == mtime
+
+def test_bulk_conversion_fails_sources_mapping_to_one_model(tmp_path):
+    from tools.sql2dbt_bulk import convert_directory
+    src, out = tmp_path / "sql", tmp_path / "models"
+    src.mkdir()
+    (src / "daily revenue.sql").write_text("SELECT 1 AS revenue")
+    (src / "daily_revenue.sql").write_text("SELECT 2 AS revenue")
+    (src / "orders.sql").write_text("SELECT * FROM orders")
+
+    for _ in range(2):
+        summary = convert_directory(str(src), str(out), workers=2)
+        assert summary["failed"] == ["daily revenue.sql", "daily_revenue.sql"]
+    assert not (out / "daily_revenue.sql").exists()
+    assert summary["skipped"] == ["orders.sql"]
+
+def test_transform_sql_refs_sources_and_incremental():
+    from tools.sql_transformer import transform_sql
+    out = transform_sql(
+        "sql2dbt select o.order_id, o.updated_at from raw.orders o join customers c on c.id = o.customer_id;",
+        "orders",
+    )
+    assert "config(materialized='incremental', unique_key='order_id')" in out
+    assert "{{ source('raw', 'orders') }} o" in out and "{{ ref('customers') }} c" in out
+    assert "current_timestamp as loaded_at" in out
+    assert "is_incremental()" in out and ";" not in out
+
+def test_transform_sql_defers_when_unsure():
+    from tools.sql_transformer import transform_sql
+    assert transform_sql("insert into x select 1", "m") is None
+    assert transform_sql("select * from a union select * from b", "m") is None
+
+def test_transform_sql_ignores_from_inside_functions():
+    from tools.sql_transformer import transform_sql
+    out = transform_sql("select extract(year from created_at) as yr, id from orders", "m")
+    assert "extract(year from created_at)" in out and "{{ ref('orders') }}" in out
+    out = transform_sql("select trim(both from name) as name, id from customers", "m")
+    assert "trim(both from name)" in out and "{{ ref('customers') }}" in out
+    out = transform_sql("select id from orders where customer_id in (select id from customers)", "m")
+    assert "(select id from {{ ref('customers') }})" in out
+
+def test_transform_sql_incremental_filter_wraps_or_condition():
+    from tools.sql_transformer import transform_sql
+    out = transform_sql(
+        "select o.order_id, o.updated_at from orders o where o.status = 'a' or o.status = 'b'", "orders"
+    )
+    assert "where (o.status = 'a' or o.status = 'b')" in out
+    assert "and o.updated_at > (select max(updated_at) from {{ this }})" in out
+
+def test_transform_sql_loaded_at_goes_before_trailing_comment():
+    from tools.sql_transformer import transform_sql
+    out = transform_sql("select id,\n  amount -- dollars\nfrom payments", "m")
+    assert "amount, current_timestamp as loaded_at -- dollars\nfrom {{ ref('payments') }}" in out
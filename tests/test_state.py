@@ -0,0 +1,40 @@
+import asyncio
+
+from utils.state import DELETED, AgentState, append_errors, merge_context, updates_only
+
+
+def test_defaults_are_not_shared():
+    a, b = AgentState(goal="a"), AgentState(goal="b")
+    a.errors.append("boom")
+    a.context["k"] = 1
+    assert b.errors == [] and b.context == {}
+
+
+def test_reducers_append_and_merge():
+    assert append_errors(["a"], ["b"]) == ["a", "b"]
+    assert merge_context({"a": 1, "b": 2}, {"b": 3, "c": 4, DELETED: ["a"]}) == {"b": 3, "c": 4}
+
+
+def test_updates_only_returns_just_the_changes():
+    sql = "select 1\n" * 10_000
+
+    def node(state):
+        state.attempts += 1
+        state.errors.append("oops")
+        state.context["new"] = True
+        state.context.pop("gone")
+        return state
+
+    state = AgentState(goal="g", errors=["old"], context={"sql": sql, "gone": 1})
+    update = updates_only(node)(state)
+    assert update == {"attempts": 1, "errors": ["oops"], "context": {"new": True, DELETED: ["gone"]}}
+
+
+def test_updates_only_sees_one_level_in_place_edits_and_async_nodes():
+    async def node(state):
+        state.result["explanation"] = "because"
+        return state
+
+    state = AgentState(goal="g", result={"value": 5})
+    update = asyncio.run(updates_only(node)(state))
+    assert update == {"result": {"value": 5, "explanation": "because"}}
@@ -2,6 +2,7 @@
 import ast
 import operator as op
 import re
+from functools import lru_cache
 from utils.logger import logger
 
 operators = {
@@ -13,20 +14,128 @@ operators = {
     ast.USub: op.neg,
 }
 
-def _eval_expr(node):
-    if isinstance(node, ast.Num):  # Python <3.8
-        return node.n
-    if isinstance(node, ast.Constant):  # Python >=3.8
-        return node.value
+def _is_number(node) -> bool:
+    return isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool)
+
+def _compile_node(node, names: set):
+    """Turn a whitelisted AST node into a closure over an environment dict."""
+    if _is_number(node):
+        value = node.value
+        return lambda env: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        names.add(name)
+        return lambda env: env[name]
     if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
-        return operators[ast.USub]
-    if isinstance(node, ast.BinOp):
-        left = _eval_expr(node.left)
-        right = _eval_expr(node.right)
+        operand = _compile_node(node.operand, names)
+        neg = operators[ast.USub]
+        return lambda env: neg(operand(env))
+    if isinstance(node, ast.BinOp) and type(node.op) in operators:
+        left = _compile_node(node.left, names)
+        right = _compile_node(node.right, names)
         func = operators[type(node.op)]
-        return func(left, right)
+        return lambda env: func(left(env), right(env))
     raise ValueError("Unsupported expression")
 
+class CompiledExpression:
+    """An expression parsed and validated once; call it with variable bindings."""
+
+    __slots__ = ("expression", "variables", "_fn")
+
+    def __init__(self, expression: str):
+        names = set()
+        self._fn = _compile_node(ast.parse(expression, mode="eval").body, names)
+        self.expression = expression
+        self.variables = frozenset(names)
+
+    def __call__(self, **bindings):
+        missing = self.variables.difference(bindings)
+        if missing:
+            raise ValueError(f"Unbound variables: {', '.join(sorted(missing))}")
+        return self._fn(bindings)
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse + validate once per distinct expression string."""
+    return CompiledExpression(expression)
+
+def _numpy():
+    try:
+        import numpy as np
+        return np
+    except ImportError:
+        return None
+
+def calc_batch(expressions, bindings=None):
+    """
+    Evaluate many expressions, or one expression over many bindings.
+
+    - calc_batch(["1+2", "x*2"], {"x": 3}) -> [{"expression", "value"} | {"expression", "error"}, ...]
+    - calc_batch("price * qty", {"price": [...], "qty": [...]}) -> one vectorized pass,
+      NumPy array out when NumPy is installed
+    - calc_batch("price * qty", [{"price": 1, "qty": 2}, ...]) -> rows are columnised first
+    """
+    if isinstance(expressions, str):
+        compiled = compile_expression(expressions)
+        np = _numpy()
+        if isinstance(bindings, (list, tuple)):
+            if np is None:
+                return [compiled(**row) for row in bindings]
+            columns = {name: np.asarray([row[name] for row in bindings]) for name in compiled.variables}
+            return compiled(**columns).tolist() if columns else [compiled() for _ in bindings]
+        columns = dict(bindings or {})
+        if np is not None:
+            columns = {name: np.asarray(value) for name, value in columns.items()}
+        return compiled(**columns)
+
+    results = []
+    for expr in expressions:
+        try:
+            results.append({"expression": expr, "value": compile_expression(expr)(**(bindings or {}))})
+        except Exception as e:
+            results.append({"expression": expr, "error": str(e)})
+    return results
+
+_SYMBOLS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Pow: "**"}
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else f"{value:.12g}"
+    return str(value)
+
+def _operand(value) -> str:
+    return f"({_fmt(value)})" if value < 0 else _fmt(value)
+
+def _walk_steps(node, steps: list):
+    """Evaluate like _compile_node (same whitelist), recording each operation as (text, value) in evaluation order."""
+    if _is_number(node):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        operand = _walk_steps(node.operand, steps)
+        value = operators[ast.USub](operand)
+        if not isinstance(node.operand, ast.Constant):
+            steps.append((f"-({_fmt(operand)})", value))
+        return value
+    if isinstance(node, ast.BinOp) and type(node.op) in operators:
+        left = _walk_steps(node.left, steps)
+        right = _walk_steps(node.right, steps)
+        value = operators[type(node.op)](left, right)
+        steps.append((f"{_operand(left)} {_SYMBOLS[type(node.op)]} {_operand(right)}", value))
+        return value
+    raise ValueError("Unsupported expression")
+
+def explain_expression(expression: str) -> str:
+    """
+    Markdown walk-through of an arithmetic expression: one numbered line per
+    operation in evaluation order (precedence and parentheses respected),
+    then the final result. Local and deterministic; no LLM involved.
+    """
+    steps = []
+    value = _walk_steps(ast.parse(expression, mode="eval").body, steps)
+    lines = [f"{i}. `{text}` = `{_fmt(result)}`" for i, (text, result) in enumerate(steps, 1)]
+    body = "**Steps**\n\n" + "\n".join(lines) + "\n\n" if len(steps) > 1 else ""
+    return f"{body}**Result:** `{expression}` = **{_fmt(value)}**"
+
 def extract_expression(text: str) -> str:
     tokens = re.findall(r"[0-9]+(?:\.[0-9]+)?|[+\-*/()]", text)
     if not tokens:
@@ -37,6 +146,40 @@ def extract_expression(text: str) -> str:
         return ""
     return expr
 
+_LEAD_WORDS = re.compile(
+    r"^(?:(?:please|calc(?:ulate)?|compute|evaluate|solve|expression|what\s+is|what's|whats)\b[\s:]*)+"
+)
+_WORD_OPS = [
+    (re.compile(r"(\d+(?:\.\d+)?)\s*(?:%|percent)\s+of\s+(\d+(?:\.\d+)?)"), r"(\1 / 100 * \2)"),
+    (re.compile(r"\bmultiplied\s+by\b"), "*"),
+    (re.compile(r"\bdivided\s+by\b"), "/"),
+    (re.compile(r"\btimes\b"), "*"),
+    (re.compile(r"\bplus\b"), "+"),
+    (re.compile(r"\bminus\b"), "-"),
+]
+_ARITHMETIC_ONLY = re.compile(r"^[0-9.\s+\-*/()]+$")
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub)
+
+def parse_local_expression(text: str):
+    """
+    Deterministically turn a goal into an arithmetic expression, or return None.
+    Only succeeds when nothing but the leading command word, a few spelled-out
+    operators ("plus", "percent of", ...) and arithmetic remain, and the result
+    parses into whitelisted AST nodes; anything else is left for the LLM.
+    """
+    expr = _LEAD_WORDS.sub("", text.strip().lower()).strip().rstrip("?.=! ")
+    for pattern, repl in _WORD_OPS:
+        expr = pattern.sub(repl, expr)
+    if not expr or not _ARITHMETIC_ONLY.match(expr) or not re.search(r"[+\-*/]", expr):
+        return None
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError:
+        return None
+    if not all(isinstance(n, _ALLOWED_NODES) for n in ast.walk(tree)):
+        return None
+    return expr.strip()
+
 def calc_tool(state):
     raw_expr = state.context.get("expression") or state.goal.replace("calc", "").strip()
     expr = extract_expression(raw_expr)
@@ -46,8 +189,7 @@ def calc_tool(state):
         return state
 
     try:
-        node = ast.parse(expr, mode='eval').body
-        value = _eval_expr(node)
+        value = compile_expression(expr)()
         state.result = {"expression": expr, "value": value}
     except Exception as e:
         state.errors.append(str(e))
@@ -0,0 +1,217 @@
+import importlib
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """
+    Everything the graph needs to know about a tool.
+    pre_node / post_node name hook nodes (see HookNode) run before / after
+    execute (e.g. an LLM interpreter or explainer); max_attempts caps the
+    evaluate/decide retry loop for this tool.
+    func / afunc may be "module:attr" strings so the tool module is only
+    imported the first time the tool actually runs. speculative marks
+    tools that are safe to run on a guess, in parallel with others, when
+    routing is ambiguous (no side effects such as writing files).
+    """
+    name: str
+    func: Union[Callable, str]
+    afunc: Optional[Union[Callable, str]] = None
+    triggers: Tuple[str, ...] = ()
+    pre_node: Optional[str] = None
+    post_node: Optional[str] = None
+    max_attempts: int = 3
+    weight: float = 1.0
+    speculative: bool = True
+
+    def get_func(self) -> Callable:
+        return resolve(self.func)
+
+    def get_afunc(self) -> Optional[Callable]:
+        return resolve(self.afunc)
+
+
+@dataclass(frozen=True)
+class HookNode:
+    """
+    A graph node tools can run before or after execute. func / afunc take
+    and return the AgentState and, like ToolSpec's, may be "module:attr"
+    strings resolved when the graph is built.
+    """
+    name: str
+    func: Union[Callable, str]
+    afunc: Optional[Union[Callable, str]] = None
+
+    def get_func(self) -> Callable:
+        return resolve(self.func)
+
+    def get_afunc(self) -> Optional[Callable]:
+        return resolve(self.afunc)
+
+
+@lru_cache(maxsize=None)
+def _import_target(path: str) -> Callable:
+    module, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def resolve(target: Optional[Union[Callable, str]]) -> Optional[Callable]:
+    """Callable for a ToolSpec func/afunc given either directly or as a "module:attr" import string."""
+    if target is None or callable(target):
+        return target
+    return _import_target(target)
+
+
+@dataclass(frozen=True)
+class RouteChoice:
+    tool: str
+    score: float
+    confidence: float
+    ranked: Tuple[Tuple[str, float], ...] = ()
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex for a set of literals with shared prefixes factored out (a trie),
+    so each position of the goal branches on one character instead of
+    trying every trigger. Optional suffixes are greedy: longest match wins.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class Router:
+    """
+    All tool triggers compiled into one trie-shaped regex, so routing is a
+    single scan of the goal however many tools exist. Each trigger hit adds
+    the tool's weight; ties go to registration order.
+    """
+
+    def __init__(self, specs: Iterable[ToolSpec], default: str):
+        self.default = default
+        self._order: Dict[str, int] = {}
+        self._weights: Dict[str, float] = {}
+        self._trigger_tools: Dict[str, List[str]] = {}
+        for spec in specs:
+            self._order[spec.name] = len(self._order)
+            self._weights[spec.name] = spec.weight
+            for trigger in spec.triggers:
+                self._trigger_tools.setdefault(trigger.lower(), []).append(spec.name)
+        self._pattern = re.compile(_trie_pattern(self._trigger_tools)) if self._trigger_tools else None
+
+    def route(self, goal: str) -> RouteChoice:
+        scores: Dict[str, float] = {}
+        if self._pattern is not None:
+            for match in self._pattern.finditer(goal.lower()):
+                for tool in self._trigger_tools[match.group(0)]:
+                    scores[tool] = scores.get(tool, 0.0) + self._weights[tool]
+        if not scores:
+            return RouteChoice(tool=self.default, score=0.0, confidence=0.0)
+        ranked = tuple(sorted(scores.items(), key=lambda kv: (-kv[1], self._order[kv[0]])))
+        tool, score = ranked[0]
+        return RouteChoice(tool=tool, score=score, confidence=score / sum(scores.values()), ranked=ranked)
+
+
+_TOOLS: Dict[str, ToolSpec] = {}
+_HOOKS: Dict[str, HookNode] = {}
+_GRAPH_NODES = frozenset({"plan", "speculate", "execute", "evaluate", "decide"})
+_router: Optional[Router] = None
+_lock = threading.Lock()
+DEFAULT_TOOL = "search"
+
+
+def register_hook(hook: HookNode):
+    """Add or replace a hook node that tools can name as pre_node / post_node."""
+    if hook.name in _GRAPH_NODES:
+        raise ValueError(f"Hook node {hook.name!r} clashes with a built-in graph node")
+    with _lock:
+        _HOOKS[hook.name] = hook
+
+
+def get_hook(name: Optional[str]) -> Optional[HookNode]:
+    return _HOOKS.get(name)
+
+
+def register_tool(spec: ToolSpec):
+    """Add or replace a tool; the router is rebuilt lazily on the next route()."""
+    global _router
+    for hook in (spec.pre_node, spec.post_node):
+        if hook is not None and hook not in _HOOKS:
+            raise ValueError(
+                f"Tool {spec.name!r} names unknown hook node {hook!r}; register it with register_hook() first"
+            )
+    with _lock:
+        _TOOLS[spec.name] = spec
+        _router = None
+
+
+def get_tool(name: Optional[str]) -> Optional[ToolSpec]:
+    return _TOOLS.get(name)
+
+
+def list_tools() -> List[ToolSpec]:
+    return list(_TOOLS.values())
+
+
+def preload_tools():
+    """Import every lazily registered tool now (warm-up)."""
+    for spec in list_tools():
+        spec.get_func()
+        spec.get_afunc()
+
+
+def get_router() -> Router:
+    global _router
+    if _router is None:
+        with _lock:
+            if _router is None:
+                _router = Router(_TOOLS.values(), DEFAULT_TOOL)
+    return _router
+
+
+def route(goal: str) -> RouteChoice:
+    return get_router().route(goal)
+
+
+register_hook(HookNode("interpret_math", "graph:interpret_math_node", "graph:ainterpret_math_node"))
+register_hook(HookNode("generate", "graph:generate_node", "graph:agenerate_node"))
+register_hook(HookNode("explain_calc", "graph:explain_calc_node", "graph:aexplain_calc_node"))
+
+register_tool(ToolSpec(
+    name="calc",
+    func="tools.calc_agent:calc_tool",
+    triggers=("calc", "calculate", "expression"),
+    pre_node="interpret_math",
+    post_node="explain_calc",
+))
+register_tool(ToolSpec(
+    name="sql2dbt",
+    func="tools.sql2dbt_agent:sql2dbt_tool",
+    afunc="tools.sql2dbt_agent:asql2dbt_tool",
+    triggers=("dbt", "sql2dbt", "convert sql", "model"),
+    pre_node="generate",
+    speculative=False,  # writes model files
+))
+register_tool(ToolSpec(
+    name="search",
+    func="tools.search_agent:search_tool",
+    afunc="tools.search_agent:asearch_tool",
+    triggers=("search", "duckduckgo", "find"),
+))
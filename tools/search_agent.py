@@ -1,64 +1,214 @@
 
+import asyncio
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Dict
+from monitoring.metrics import SEARCH_ABANDONED, SEARCH_CACHE, SEARCH_INDEX, SEARCH_LATENCY, SEARCH_REQUESTS
 from utils.logger import logger
+from utils.ttl_cache import TTLCache
+from tools.search_index import get_search_index
+from tools.search_ranking import refine_results
+from config import (
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_SIZE,
+    SEARCH_REGION,
+    SEARCH_MODE,
+    SEARCH_DEADLINE,
+    SEARCH_HEDGE_DELAY,
+    SEARCH_WORKERS,
+    SEARCH_HEDGE_WORKERS,
+    SEARCH_BACKEND_TIMEOUT,
+    SEARCH_OVERFETCH,
+)
 
-def _is_ascii(s: str) -> bool:
-    """Check if string contains only ASCII characters."""
-    return all(ord(c) < 128 for c in s)
+_search_cache = TTLCache(ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_SIZE)
 
-def _search_duckduckgo(query: str, max_results: int = 5):
+def _ddgs_backend(query: str, max_results: int = 5, region: str = SEARCH_REGION, timeout: float = SEARCH_BACKEND_TIMEOUT):
+    """DuckDuckGo via the ddgs client. Prefer English results using region="wt-wt"."""
+    from ddgs import DDGS
+    with DDGS(timeout=timeout) as ddgs:  # bounds calls a hedged search abandons
+        results = ddgs.text(
+            query,
+            region=region,          # "wt-wt" = worldwide English
+            safesearch="moderate",  # Suitable default
+            max_results=max_results
+        )
+    # Mapped lazily: refine_results stops reading once it has enough good hits
+    return (
+        {"title": r.get("title") or "Untitled", "link": r.get("href") or "#", "snippet": r.get("body") or ""}
+        for r in results or ()
+    )
+
+@lru_cache(maxsize=1)
+def _langchain_tool():
+    """langchain_community is heavy: import it and build the tool once, on first fallback."""
+    from langchain_community.tools import DuckDuckGoSearchRun
+    return DuckDuckGoSearchRun()
+
+def _langchain_backend(query: str, max_results: int = 5, region: str = SEARCH_REGION):
+    """LangChain community wrapper; returns one blob snippet."""
+    out = _langchain_tool().run(query)
+    return [{"title": "Result", "link": "#", "snippet": out}]
+
+# Ordered by preference. Each backend is fn(query, max_results, region) -> iterable of {title, link, snippet};
+# it is asked for max_results * SEARCH_OVERFETCH raw hits so dedup/filtering can still fill max_results.
+SEARCH_BACKENDS: Dict[str, Callable] = {
+    "ddgs": _ddgs_backend,
+    "langchain": _langchain_backend,
+}
+
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+# Hedges get their own pool: slow fallbacks left running can never queue a new primary call.
+_hedge_executor = ThreadPoolExecutor(max_workers=SEARCH_HEDGE_WORKERS, thread_name_prefix="search-hedge")
+
+def register_backend(name: str, fn: Callable, first: bool = False):
+    """Add or replace a search backend (e.g. a local stand-in for tests)."""
+    SEARCH_BACKENDS.pop(name, None)
+    if first:
+        items = list(SEARCH_BACKENDS.items())
+        SEARCH_BACKENDS.clear()
+        SEARCH_BACKENDS[name] = fn
+        SEARCH_BACKENDS.update(items)
+    else:
+        SEARCH_BACKENDS[name] = fn
+
+def _call_backend(name: str, backend: Callable, query: str, max_results: int, region: str):
+    """Run one backend and refine its hits, recording latency and outcome (ok / empty / error)."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        results = refine_results(backend(query, max_results * SEARCH_OVERFETCH, region), query, max_results)
+        outcome = "ok" if results else "empty"
+        return results
+    finally:
+        SEARCH_LATENCY.observe(time.perf_counter() - start, name)
+        SEARCH_REQUESTS.inc(name, outcome)
+
+def _search_sequential(query: str, max_results: int = 5, region: str = SEARCH_REGION):
+    """Try each backend in order until one returns results."""
+    for name, backend in list(SEARCH_BACKENDS.items()):
+        try:
+            results = _call_backend(name, backend, query, max_results, region)
+            if results:
+                return results
+        except Exception as e:
+            logger.warning(f"Search backend '{name}' failed, trying next: {e}")
+    logger.error("All search backends failed")
+    return []
+
+def _search_hedged(
+    query: str,
+    max_results: int = 5,
+    region: str = SEARCH_REGION,
+    deadline: float = SEARCH_DEADLINE,
+    hedge_delay: float = SEARCH_HEDGE_DELAY,
+):
     """
-    Search DuckDuckGo and return structured results: title, link, snippet.
-    Prefer English results using region="wt-wt".
+    Start the primary backend, then launch the next one every `hedge_delay`
+    seconds (or as soon as a running one fails) until something returns
+    results or `deadline` expires. The primary runs on the search pool and
+    hedges on their own pool. Losing calls are cancelled if still queued and
+    otherwise abandoned to finish in the background (counted in
+    SEARCH_ABANDONED; the ddgs client caps them at SEARCH_BACKEND_TIMEOUT).
     """
+    backends = list(SEARCH_BACKENDS.items())
+    start = time.monotonic()
+    end = start + deadline
+    pending = {}
+    next_idx = 0
+    next_launch = start
     try:
-        from ddgs import DDGS
-        with DDGS() as ddgs:
-            results = ddgs.text(
-                query,
-                region="wt-wt",         # Worldwide English
-                safesearch="moderate",  # Suitable default
-                max_results=max_results
-            )
-
-            structured_results = []
-            for r in results:
-                title = r.get("title") or "Untitled"
-                link = r.get("href") or "#"
-                snippet = r.get("body") or ""
-                if _is_ascii(snippet):
-                    structured_results.append({
-                        "title": title,
-                        "link": link,
-                        "snippet": snippet
-                    })
-
-            # Fallback: if filtering removes everything, return original results
-            return structured_results if structured_results else [
-                {
-                    "title": r.get("title") or "Untitled",
-                    "link": r.get("href") or "#",
-                    "snippet": r.get("body") or ""
-                }
-                for r in results
-            ]
-    except Exception as e:
-        logger.warning(f"DuckDuckGo search failed, fallback to LangChain tool: {e}")
-
-    # Fallback: LangChain community wrapper
-    try:
-        from langchain_community.tools import DuckDuckGoSearchRun
-        tool = DuckDuckGoSearchRun()
-        out = tool.run(query)
-        return [{"title": "Result", "link": "#", "snippet": out}]
-    except Exception as e:
-        logger.error(f"DuckDuckGo search fallback failed: {e}")
-        return []
+        while True:
+            now = time.monotonic()
+            if next_idx < len(backends) and (now >= next_launch or not pending):
+                name, backend = backends[next_idx]
+                pool = _hedge_executor if next_idx else _executor
+                next_idx += 1
+                pending[pool.submit(_call_backend, name, backend, query, max_results, region)] = name
+                next_launch = now + hedge_delay
+            if not pending:
+                logger.error("All search backends failed")
+                return []
+            if now >= end:
+                logger.warning(f"Search deadline of {deadline}s exceeded for '{query}'")
+                return []
+            wake = end if next_idx >= len(backends) else min(end, next_launch)
+            done, _ = wait(pending, timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = pending.pop(fut)
+                try:
+                    results = fut.result()
+                except Exception as e:
+                    logger.warning(f"Search backend '{name}' failed: {e}")
+                    results = None
+                if results:
+                    return results
+                next_launch = time.monotonic()
+    finally:
+        for fut, name in pending.items():
+            if not fut.cancel():
+                SEARCH_ABANDONED.inc(name)
+
+def _search_duckduckgo(query: str, max_results: int = 5, region: str = SEARCH_REGION):
+    """
+    Search and return structured results: title, link, snippet.
+    The local snippet index answers first when it has enough fresh matches;
+    otherwise SEARCH_MODE picks sequential fallback or hedged, deadline-bounded
+    backends, and their hits are added to the index. If every backend fails,
+    older indexed matches are served instead.
+    """
+    index = get_search_index()
+    if index is not None:
+        local = index.lookup(query, max_results)
+        SEARCH_INDEX.inc("hit" if local else "miss")
+        if local:
+            return refine_results(local, query, max_results)
+
+    if SEARCH_MODE == "hedged":
+        results = _search_hedged(query, max_results, region)
+    else:
+        results = _search_sequential(query, max_results, region)
+
+    if index is not None:
+        if results:
+            index.add(query, results)
+        else:
+            results = index.lookup(query, max_results, fresh_only=False)
+            if results:
+                SEARCH_INDEX.inc("outage")
+                logger.warning(f"Search backends failed; serving {len(results)} indexed hits for '{query}'")
+    return results
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+def cached_search(query: str, max_results: int = 5, region: str = SEARCH_REGION):
+    """
+    TTL/LRU-cached search keyed on the normalized query, region and max_results.
+    Concurrent identical queries share a single in-flight backend call;
+    empty result sets are not cached so failures are retried.
+    """
+    key = (normalize_query(query), region, max_results)
+    computed = []
+
+    def compute():
+        computed.append(True)
+        return _search_duckduckgo(query, max_results, region)
+
+    results = _search_cache.get_or_compute(key, compute)
+    SEARCH_CACHE.inc("miss" if computed else "hit")
+    return results
 
 def search_tool(state):
     query = state.context.get("query") or state.goal
-    state.attempts += 1
-    res = _search_duckduckgo(query)
+    res = cached_search(query)
     state.result = {"query": query, "snippets": res}
     if not res:
         state.errors.append("No search results")
     return state
+
+async def asearch_tool(state):
+    """Async search_tool: the DDGS client is blocking, so run it off the event loop."""
+    return await asyncio.to_thread(search_tool, state)
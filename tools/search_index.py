@@ -0,0 +1,211 @@
+"""
+Persistent full-text index of every search hit we have fetched.
+
+Hits are stored once per canonical URL in SQLite with an FTS5 index over
+(title, snippet, query). search_tool consults it before the network: when
+enough hits fetched within SEARCH_INDEX_FRESHNESS match most of the query's
+terms, they are served locally. When every backend fails, any matching hit
+is served regardless of age, so search keeps working during outages. The
+table holds at most SEARCH_INDEX_MAX_ENTRIES rows (least recently used go).
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import (
+    SEARCH_INDEX_ENABLED,
+    SEARCH_INDEX_PATH,
+    SEARCH_INDEX_FRESHNESS,
+    SEARCH_INDEX_MAX_ENTRIES,
+    SEARCH_INDEX_MIN_MATCH,
+    SEARCH_INDEX_MIN_HITS,
+)
+from tools.search_ranking import canonical_url, query_terms, tokenize
+from utils.logger import logger
+
+_EVICT_EVERY = 64
+_OPERATOR = re.compile(r"\b\w+:\S+")  # site:docs, filetype:pdf, ...
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,
+    url_key TEXT NOT NULL UNIQUE,
+    query TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5(
+    title, snippet, query, content='snippets', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS snippets_ai AFTER INSERT ON snippets BEGIN
+    INSERT INTO snippets_fts(rowid, title, snippet, query) VALUES (new.id, new.title, new.snippet, new.query);
+END;
+CREATE TRIGGER IF NOT EXISTS snippets_ad AFTER DELETE ON snippets BEGIN
+    INSERT INTO snippets_fts(snippets_fts, rowid, title, snippet, query)
+    VALUES ('delete', old.id, old.title, old.snippet, old.query);
+END;
+CREATE TRIGGER IF NOT EXISTS snippets_au AFTER UPDATE ON snippets BEGIN
+    INSERT INTO snippets_fts(snippets_fts, rowid, title, snippet, query)
+    VALUES ('delete', old.id, old.title, old.snippet, old.query);
+    INSERT INTO snippets_fts(rowid, title, snippet, query) VALUES (new.id, new.title, new.snippet, new.query);
+END;
+"""
+
+
+def _url_key(hit: Dict) -> str:
+    url = canonical_url(hit.get("link") or "")
+    if url and url != "#":
+        return url
+    # Link-less hits (e.g. the langchain blob) are keyed on their text.
+    return "#" + hashlib.sha1((hit.get("snippet") or "").encode("utf-8")).hexdigest()
+
+
+class SnippetIndex:
+    def __init__(
+        self,
+        path: str = SEARCH_INDEX_PATH,
+        freshness: float = SEARCH_INDEX_FRESHNESS,
+        max_entries: int = SEARCH_INDEX_MAX_ENTRIES,
+        min_match: float = SEARCH_INDEX_MIN_MATCH,
+        min_hits: int = SEARCH_INDEX_MIN_HITS,
+    ):
+        self.freshness = freshness
+        self.max_entries = max_entries
+        self.min_match = min_match
+        self.min_hits = min_hits
+        self._lock = threading.Lock()
+        self._writes = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._evict(time.time())
+
+    def add(self, query: str, hits: Iterable[Dict]):
+        """Upsert fetched hits (one row per canonical URL, newest snippet wins)."""
+        now = time.time()
+        rows = [
+            (_url_key(h), query, h.get("title") or "", h.get("link") or "#", h.get("snippet") or "", now, now)
+            for h in hits
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO snippets (url_key, query, title, link, snippet, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(url_key) DO UPDATE SET "
+                "query = excluded.query, title = excluded.title, link = excluded.link, "
+                "snippet = excluded.snippet, fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at",
+                rows,
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict(now)
+
+    def lookup(self, query: str, max_results: int = 5, fresh_only: bool = True) -> List[Dict]:
+        """
+        Indexed hits for the query, best FTS5 bm25 first. With fresh_only (the
+        normal path) only hits fetched within the freshness window that contain
+        at least min_match of the query terms count, and fewer than
+        min(min_hits, max_results) of them is a miss ([]). Without it
+        (outage fallback) any match is returned.
+        """
+        terms = query_terms(_OPERATOR.sub(" ", query))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        now = time.time()
+        oldest = now - self.freshness if fresh_only else 0.0
+        try:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT s.id, s.title, s.link, s.snippet, s.query FROM snippets_fts "
+                    "JOIN snippets AS s ON s.id = snippets_fts.rowid "
+                    "WHERE snippets_fts MATCH ? AND s.fetched_at >= ? "
+                    "ORDER BY bm25(snippets_fts) LIMIT ?",
+                    (match, oldest, max_results * 4),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Search index lookup failed: {e}")
+            return []
+
+        hits, ids = [], []
+        for row_id, title, link, snippet, stored_query in rows:
+            if fresh_only:
+                found = terms.intersection(tokenize(f"{title} {snippet} {stored_query}"))
+                if len(found) < self.min_match * len(terms):
+                    continue
+            hits.append({"title": title, "link": link, "snippet": snippet})
+            ids.append(row_id)
+            if len(hits) >= max_results:
+                break
+        if fresh_only and len(hits) < min(self.min_hits, max_results):
+            return []
+        if ids:
+            with self._lock:
+                self._db.executemany("UPDATE snippets SET accessed_at = ? WHERE id = ?", [(now, i) for i in ids])
+                self._db.commit()
+        return hits
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM snippets")
+            self._db.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM snippets").fetchone()[0]
+
+    def _evict(self, now: float):
+        """Drop the least recently used rows beyond max_entries."""
+        try:
+            self._db.execute(
+                "DELETE FROM snippets WHERE id IN ("
+                "SELECT id FROM snippets ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Search index eviction failed: {e}")
+
+
+_UNSET = object()
+_index = _UNSET
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SnippetIndex]:
+    """Process-wide index, or None when SEARCH_INDEX_ENABLED is off (or SQLite/FTS5 is unavailable)."""
+    global _index
+    if _index is _UNSET:
+        with _index_lock:
+            if _index is _UNSET:
+                index = None
+                if SEARCH_INDEX_ENABLED:
+                    try:
+                        index = SnippetIndex()
+                    except sqlite3.Error as e:
+                        logger.warning(f"Search index unavailable: {e}")
+                _index = index
+    return _index
+
+
+def set_search_index(index: Optional[SnippetIndex]):
+    """
+    Swap the process-wide index (None disables it); returns the previous
+    value, to be passed back to restore it. That may be an opaque "not
+    opened yet" marker, so restoring never turns a lazy index into None.
+    """
+    global _index
+    with _index_lock:
+        previous, _index = _index, index
+    return previous
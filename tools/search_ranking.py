@@ -0,0 +1,116 @@
+"""
+Post-processing for raw search backend results.
+
+refine_results() consumes a backend's results lazily and stops as soon as
+`max_results` good hits are collected. Good means ASCII (a cheap
+str.isascii() stand-in for "English"), not a canonical-URL duplicate and
+not a near-identical snippet of an earlier hit. The kept hits are then
+ranked against the query with BM25, and hits sharing no term with the
+query are dropped when at least one hit matches.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from config import SEARCH_DUP_THRESHOLD
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_TRACKING = re.compile(r"^(?:utm_\w+|fbclid|gclid|msclkid|mc_[ce]id|ref|ref_src)$")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it of on or that the this to was what when where which who why with"
+    .split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def query_terms(query: str) -> set:
+    """Distinct query tokens without stopwords (all tokens if that leaves none)."""
+    tokens = tokenize(query)
+    return {t for t in tokens if t not in _STOPWORDS} or set(tokens)
+
+
+def canonical_url(url: str) -> str:
+    """Scheme-less, lower-cased host without www., no fragment/tracking params, sorted query, no trailing slash."""
+    parts = urlsplit((url or "").strip())
+    if not parts.netloc:
+        return url or ""
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING.match(k)))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+
+def _shingles(tokens: Sequence[str], size: int = 3) -> frozenset:
+    if len(tokens) <= size:
+        return frozenset([tuple(tokens)])
+    return frozenset(tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+
+def _near_duplicate(shingles: frozenset, seen: List[frozenset], threshold: float) -> bool:
+    for other in seen:
+        overlap = len(shingles & other)
+        if overlap and overlap / len(shingles | other) >= threshold:
+            return True
+    return False
+
+
+def bm25_scores(query: str, docs: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 of each tokenized doc against the query, with IDF taken over `docs` themselves."""
+    terms = query_terms(query)
+    if not docs or not terms:
+        return [0.0] * len(docs)
+    n = len(docs)
+    avgdl = sum(len(d) for d in docs) / n or 1.0
+    df = Counter(t for d in docs for t in terms.intersection(d))
+    idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+    scores = []
+    for doc in docs:
+        tf = Counter(doc)
+        norm = k1 * (1 - b + b * len(doc) / avgdl)
+        scores.append(sum(idf[t] * tf[t] * (k1 + 1) / (tf[t] + norm) for t in terms if tf[t]))
+    return scores
+
+
+def refine_results(
+    results: Iterable[Dict],
+    query: str,
+    max_results: int,
+    dup_threshold: float = SEARCH_DUP_THRESHOLD,
+) -> List[Dict]:
+    """Filter, dedupe and BM25-rank {title, link, snippet} hits; reads `results` only as far as needed."""
+    kept, docs, seen_urls, seen_shingles = [], [], set(), []
+    non_ascii = []  # only used when nothing ASCII comes back
+    for hit in results:
+        snippet = hit.get("snippet") or ""
+        if not snippet.isascii():
+            if len(non_ascii) < max_results:
+                non_ascii.append(hit)
+            continue
+        url = canonical_url(hit.get("link") or "")
+        if url and url != "#" and url in seen_urls:
+            continue
+        tokens = tokenize(f"{hit.get('title') or ''} {snippet}")
+        shingles = _shingles(tokenize(snippet) or tokens)
+        if _near_duplicate(shingles, seen_shingles, dup_threshold):
+            continue
+        seen_urls.add(url)
+        seen_shingles.append(shingles)
+        kept.append(hit)
+        docs.append(tokens)
+        if len(kept) >= max_results:
+            break
+    if not kept:
+        return non_ascii
+
+    scores = bm25_scores(query, docs)
+    ranked = sorted(range(len(kept)), key=lambda i: -scores[i])  # stable: ties keep backend order
+    if scores[ranked[0]] > 0:
+        ranked = [i for i in ranked if scores[i] > 0]
+    return [kept[i] for i in ranked]
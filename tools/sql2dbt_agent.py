@@ -1,8 +1,11 @@
 
 from utils.logger import logger
 from config import DBT_DIR
+from tools.sql_transformer import transform_sql
+import asyncio
 import os
 import re
+import tempfile
 
 def sanitize_model_name(name: str) -> str:
     name = name.lower().strip()
@@ -18,24 +21,59 @@ def default_dbt_model(sql: str, model_name: str) -> str:
 {sql.strip()}
 """
 
-def write_model_file(content: str, file_name: str = None, folder: str = DBT_DIR):
+def looks_like_dbt_model(sql: str) -> bool:
+    """True for text that already carries a dbt config block (e.g. LLM output)."""
+    return "{{" in sql and "config(" in sql
+
+def build_dbt_model(sql: str, model_name: str) -> str:
+    """Local transformer first; plain view wrapper when it is not confident."""
+    if looks_like_dbt_model(sql):
+        return sql.strip() + "\n"
+    return transform_sql(sql, model_name) or default_dbt_model(sql, model_name)
+
+def write_if_changed(path: str, content: str) -> bool:
+    """
+    Atomically replace `path` with `content` (temp file + os.replace).
+    Returns False without touching the file (or its mtime) when it already holds `content`.
+    """
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    folder = os.path.dirname(path) or "."
     os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+def write_model_file(content: str, file_name: str = None, folder: str = DBT_DIR):
     path = os.path.join(folder, file_name or "model.sql")
-    with open(path, "w") as f:
-        f.write(content)
+    write_if_changed(path, content)
     return path
 
 def sql2dbt_tool(state):
     """Converts SQL string in state.context['sql'] to a dbt model file locally."""
     sql = state.context.get("sql") or state.goal
     model_name = sanitize_model_name(state.context.get("model_name", "generated_model"))
-    state.attempts += 1
     try:
-        content = default_dbt_model(sql, model_name)
+        content = state.context.get("dbt_model") or build_dbt_model(sql, model_name)
         path = write_model_file(content, f"{model_name}.sql")
-        state.result = {"model_path": path, "model_name": model_name, "model_content": sql}
+        state.result = {"model_path": path, "model_name": model_name, "model_content": content}
         return state
     except Exception as e:
         logger.error(f"sql2dbt_tool error: {e}")
         state.errors.append(str(e))
         return state
+
+async def asql2dbt_tool(state):
+    """Async sql2dbt_tool: file writes happen off the event loop."""
+    return await asyncio.to_thread(sql2dbt_tool, state)
@@ -0,0 +1,126 @@
+"""
+Bulk, incremental SQL -> dbt conversion.
+
+    python -m tools.sql2dbt_bulk path/to/sql [--out dbt_models] [--workers 8] [--force]
+
+Walks the source directory for *.sql files, converts them on a worker pool
+and records a content-hash manifest next to the output so unchanged inputs
+are skipped on the next run. Outputs are written atomically and only when
+their content changes, so dbt's partial parsing sees stable mtimes.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from config import DBT_DIR, BULK_WORKERS
+from tools.sql2dbt_agent import build_dbt_model, sanitize_model_name, write_if_changed
+from utils.logger import logger
+
+MANIFEST_NAME = ".sql2dbt_manifest.json"
+# Bump when the conversion output changes so every input is re-converted once.
+CONVERTER_VERSION = "3"
+
+
+def _digest(sql: str) -> str:
+    return hashlib.sha256(f"{CONVERTER_VERSION}\n{sql}".encode("utf-8")).hexdigest()
+
+
+def convert_sql(sql: str, model_name: str) -> str:
+    return build_dbt_model(sql, model_name)
+
+
+def _output_rel_path(rel: str) -> str:
+    folder, file_name = os.path.split(rel)
+    model_name = sanitize_model_name(os.path.splitext(file_name)[0])
+    return os.path.join(folder, f"{model_name}.sql")
+
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _convert_one(src_dir: str, out_dir: str, rel: str, previous: Optional[dict], force: bool):
+    with open(os.path.join(src_dir, rel), "r") as f:
+        sql = f.read()
+    digest = _digest(sql)
+    out_rel = _output_rel_path(rel)
+    out_path = os.path.join(out_dir, out_rel)
+    if not force and previous and previous.get("sha256") == digest and os.path.exists(out_path):
+        return rel, "skipped", {"sha256": digest, "output": out_rel}
+    model_name = os.path.splitext(os.path.basename(out_rel))[0]
+    changed = write_if_changed(out_path, convert_sql(sql, model_name))
+    return rel, "converted" if changed else "unchanged", {"sha256": digest, "output": out_rel}
+
+
+def convert_directory(
+    src_dir: str,
+    out_dir: str = DBT_DIR,
+    workers: int = BULK_WORKERS,
+    manifest_path: Optional[str] = None,
+    force: bool = False,
+) -> Dict[str, list]:
+    """Convert every *.sql under src_dir; returns rel paths grouped by outcome."""
+    manifest_path = manifest_path or os.path.join(out_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    rels = sorted(
+        os.path.relpath(os.path.join(root, name), src_dir)
+        for root, _, files in os.walk(src_dir)
+        for name in files
+        if name.lower().endswith(".sql")
+    )
+
+    summary = {"converted": [], "unchanged": [], "skipped": [], "failed": []}
+    # Sources whose names sanitize to the same model would overwrite each other.
+    by_output: Dict[str, list] = {}
+    for rel in rels:
+        by_output.setdefault(_output_rel_path(rel), []).append(rel)
+    for out_rel, sources in by_output.items():
+        if len(sources) > 1:
+            logger.error(f"sql2dbt bulk: {', '.join(sources)} all map to {out_rel}; rename all but one")
+            summary["failed"].extend(sources)
+    duplicates = set(summary["failed"])
+
+    new_manifest = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            rel: pool.submit(_convert_one, src_dir, out_dir, rel, manifest.get(rel), force)
+            for rel in rels
+            if rel not in duplicates
+        }
+        for rel, future in futures.items():
+            try:
+                _, outcome, entry = future.result()
+                summary[outcome].append(rel)
+                new_manifest[rel] = entry
+            except Exception as e:
+                logger.error(f"sql2dbt bulk: {rel} failed: {e}")
+                summary["failed"].append(rel)
+
+    write_if_changed(manifest_path, json.dumps(new_manifest, indent=2, sort_keys=True))
+    logger.info(
+        "sql2dbt bulk: "
+        + ", ".join(f"{len(v)} {k}" for k, v in summary.items())
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a directory of .sql files into dbt models.")
+    parser.add_argument("src", help="Directory containing .sql files")
+    parser.add_argument("--out", default=DBT_DIR, help="Output dbt models directory")
+    parser.add_argument("--workers", type=int, default=BULK_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and re-convert everything")
+    args = parser.parse_args(argv)
+    summary = convert_directory(args.src, args.out, workers=args.workers, force=args.force)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
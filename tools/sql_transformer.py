@@ -0,0 +1,242 @@
+import re
+from typing import List, Optional
+
+import sqlparse
+from sqlparse import tokens as T
+from sqlparse.sql import Function, Identifier, IdentifierList, Parenthesis, Where
+
+_SQL_START = re.compile(r"\b(with|select)\b", re.IGNORECASE)
+# Words that mean text before the first SELECT/WITH is SQL (INSERT ... SELECT), not a chat prefix.
+_SQL_PREFIX = re.compile(
+    r"\b(insert|update|delete|merge|create|replace|alter|drop|truncate|into|table|view|as)\b", re.IGNORECASE
+)
+_NAME_TYPES = (T.Name, T.Literal.String.Symbol)
+_UPDATED_COLUMNS = ("updated_at", "modified_at", "last_modified", "last_updated_at")
+_BLOCKING_CLAUSES = {"ORDER BY", "LIMIT", "UNION", "UNION ALL", "INTERSECT", "EXCEPT", "HAVING"}
+
+
+class UnsupportedSQL(Exception):
+    """The local transformer is not confident about this statement."""
+
+
+def _unquote(name: str) -> str:
+    return name.strip('"`[]')
+
+
+def _singular(name: str) -> str:
+    if name.endswith("ies"):
+        return name[:-3] + "y"
+    if name.endswith("s") and not name.endswith("ss"):
+        return name[:-1]
+    return name
+
+
+class _Analysis:
+    def __init__(self):
+        self.ctes = set()
+        self.tables: List[str] = []
+        self.joins = 0
+
+
+def _rewrite_table(ident: Identifier, analysis: _Analysis):
+    """Swap a FROM/JOIN table name for ref()/source(); recurse into subqueries."""
+    first = ident.tokens[0]
+    if isinstance(first, Parenthesis):
+        _walk(first, analysis)
+        return
+    parts = []
+    for tok in ident.tokens:
+        if tok.ttype in _NAME_TYPES:
+            parts.append(tok)
+        elif tok.ttype is T.Punctuation and tok.value == ".":
+            continue
+        else:
+            break
+    if not parts:
+        raise UnsupportedSQL(f"Unsupported table expression: {ident}")
+    names = [_unquote(tok.value) for tok in parts]
+    if len(names) == 1 and names[0].lower() in analysis.ctes:
+        return
+    analysis.tables.append(names[-1])
+    if len(names) == 1:
+        parts[0].value = f"{{{{ ref('{names[0]}') }}}}"
+    else:
+        parts[0].value = f"{{{{ source('{names[-2]}', '{names[-1]}') }}}}"
+    # Blank the remaining name parts and the dots between them.
+    end = ident.tokens.index(parts[-1])
+    for tok in ident.tokens[1:end + 1]:
+        tok.value = ""
+
+
+def _is_subquery(tok) -> bool:
+    if not isinstance(tok, Parenthesis):
+        return False
+    inner = tok.token_next(0)[1]
+    return inner is not None and inner.ttype in (T.Keyword.DML, T.Keyword.CTE) and inner.normalized in ("SELECT", "WITH")
+
+
+def _contains_select(tok) -> bool:
+    return any(leaf.ttype is T.Keyword.DML and leaf.normalized == "SELECT" for leaf in tok.flatten())
+
+
+def _walk(tokenlist, analysis: _Analysis):
+    expect_table = False
+    for tok in tokenlist.tokens:
+        if tok.is_whitespace or tok.ttype in T.Comment:
+            continue
+        if tok.ttype is T.Keyword.CTE:
+            continue
+        if tok.ttype is T.Keyword and (tok.normalized == "FROM" or tok.normalized.endswith("JOIN")):
+            analysis.joins += tok.normalized.endswith("JOIN")
+            expect_table = True
+            continue
+        if expect_table:
+            expect_table = False
+            if isinstance(tok, IdentifierList):
+                analysis.joins += 1
+                idents = list(tok.get_identifiers())
+            else:
+                idents = [tok]
+            for ident in idents:
+                if isinstance(ident, Parenthesis):
+                    _walk(ident, analysis)
+                elif isinstance(ident, Identifier) and not isinstance(ident, Function):
+                    _rewrite_table(ident, analysis)
+                else:
+                    raise UnsupportedSQL(f"Unsupported FROM item: {ident}")
+            continue
+        if isinstance(tok, Function):
+            # FROM inside a call (extract(year from x), trim(both from x)) is not a table clause.
+            if _contains_select(tok):
+                raise UnsupportedSQL(f"Subquery inside a function: {tok}")
+            continue
+        if isinstance(tok, Parenthesis) and not _is_subquery(tok):
+            continue
+        if tok.is_group:
+            _walk(tok, analysis)
+
+
+def _collect_ctes(statement, analysis: _Analysis):
+    for i, tok in enumerate(statement.tokens):
+        if tok.ttype is T.Keyword.CTE:
+            nxt = statement.token_next(i)[1]
+            idents = nxt.get_identifiers() if isinstance(nxt, IdentifierList) else [nxt]
+            analysis.ctes.update(ident.get_name().lower() for ident in idents if isinstance(ident, Identifier))
+
+
+def _select_list(statement):
+    """Return the token holding the final top-level SELECT's column list."""
+    idx = None
+    for i, tok in enumerate(statement.tokens):
+        if tok.ttype is T.Keyword.DML and tok.normalized == "SELECT":
+            idx = i
+    if idx is None:
+        raise UnsupportedSQL("No SELECT found")
+    idx, tok = statement.token_next(idx)
+    distinct = False
+    if tok is not None and tok.ttype is T.Keyword and tok.normalized.startswith("DISTINCT"):
+        distinct = True
+        idx, tok = statement.token_next(idx)
+    if tok is None:
+        raise UnsupportedSQL("Empty SELECT list")
+    return tok, distinct
+
+
+def _columns(select_list):
+    """(output name, expression) pairs; unnamed expressions and * yield None names."""
+    items = list(select_list.get_identifiers()) if isinstance(select_list, IdentifierList) else [select_list]
+    columns = []
+    for item in items:
+        if isinstance(item, Identifier):
+            alias = item.get_alias()
+            name = alias or item.get_real_name()
+            columns.append(((name or "").lower() or None, None if alias else str(item)))
+        else:
+            columns.append((None, None))
+    return columns
+
+
+def transform_sql(sql: str, model_name: str) -> Optional[str]:
+    """
+    Deterministic SQL -> dbt model for common single-SELECT statements.
+    FROM/JOIN tables become ref() (bare names) or source() (schema-qualified),
+    a loaded_at column is appended, and the materialization / unique_key are
+    inferred from the statement. Returns None when not confident, so callers
+    can fall back to the LLM.
+    """
+    match = _SQL_START.search(sql or "")
+    if not match or "{{" in sql or "{%" in sql or _SQL_PREFIX.search(sql[:match.start()]):
+        return None
+    body = sql[match.start():].strip().rstrip(";").strip()
+    statements = [s for s in sqlparse.parse(body) if str(s).strip()]
+    if len(statements) != 1 or statements[0].get_type() != "SELECT":
+        return None
+    statement = statements[0]
+
+    analysis = _Analysis()
+    try:
+        _collect_ctes(statement, analysis)
+        _walk(statement, analysis)
+        select_list, distinct = _select_list(statement)
+    except UnsupportedSQL:
+        return None
+
+    top_keywords = {tok.normalized for tok in statement.tokens if tok.ttype is T.Keyword}
+    if top_keywords & {"UNION", "UNION ALL", "INTERSECT", "EXCEPT"}:
+        return None
+    group_by = "GROUP BY" in top_keywords
+    columns = _columns(select_list)
+    names = [name for name, _ in columns if name]
+
+    unique_key = None
+    if analysis.tables and f"{_singular(analysis.tables[0].lower())}_id" in names:
+        unique_key = f"{_singular(analysis.tables[0].lower())}_id"
+    elif "id" in names:
+        unique_key = "id"
+    if group_by:
+        idx = next(i for i, tok in enumerate(statement.tokens) if tok.normalized == "GROUP BY")
+        group_tok = statement.token_next(idx)[1]
+        group_cols = [str(t).split(".")[-1].lower() for t in (
+            group_tok.get_identifiers() if isinstance(group_tok, IdentifierList) else [group_tok])]
+        unique_key = group_cols[0] if len(group_cols) == 1 and group_cols[0] in names else None
+
+    updated = next(((name, expr) for name, expr in columns if name in _UPDATED_COLUMNS and expr), None)
+    can_filter = not (group_by or distinct or top_keywords & _BLOCKING_CLAUSES)
+    if unique_key and updated and can_filter:
+        materialized = "incremental"
+    elif group_by or analysis.joins:
+        materialized = "table"
+    else:
+        materialized = "view"
+
+    if "loaded_at" not in names:
+        # After the last real token: a trailing line comment would swallow the column.
+        last = [leaf for leaf in select_list.flatten() if not leaf.is_whitespace and leaf.ttype not in T.Comment][-1]
+        last.value = f"{last.value}, current_timestamp as loaded_at"
+
+    config = f"materialized='{materialized}'"
+    if materialized == "incremental":
+        config += f", unique_key='{unique_key}'"
+    model_sql = str(statement).strip()
+    if materialized == "incremental":
+        name, expr = updated
+        where = next((tok for tok in statement.tokens if isinstance(tok, Where)), None)
+        joiner = "where"
+        if where is not None:
+            # Parenthesize the existing condition so a top-level OR cannot escape the filter.
+            leaves = [leaf for leaf in where.flatten() if not leaf.is_whitespace and leaf.ttype not in T.Comment]
+            leaves[1].value = "(" + leaves[1].value
+            leaves[-1].value += ")"
+            model_sql = str(statement).strip()
+            joiner = "and"
+        model_sql += (
+            "\n{% if is_incremental() %}\n"
+            f"{joiner} {expr} > (select max({name}) from {{{{ this }}}})\n"
+            "{% endif %}"
+        )
+    return f"""{{{{ config({config}) }}}}
+-- Auto-generated model: {model_name}
+-- NOTE: Review tests & documentation.
+
+{model_sql}
+"""
@@ -0,0 +1,114 @@
+"""
+Durable graph checkpoints in a local SQLite file.
+
+graph.run(goal, run_id=...) compiles the graph with this store's
+SqliteSaver and uses run_id as the LangGraph thread id, so a run that
+failed or was interrupted (process restart, write error, ...) resumes
+from its last completed node instead of paying for every Groq call again.
+
+The store stays bounded: a finished run keeps only its latest checkpoint,
+runs idle for longer than CHECKPOINT_TTL are deleted, and at most
+CHECKPOINT_MAX_RUNS runs are kept (least recently used go first). Pruning
+runs when the store is opened and again every _PRUNE_EVERY touched runs, so
+long-lived processes stay bounded too.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import CHECKPOINT_PATH, CHECKPOINT_TTL, CHECKPOINT_MAX_RUNS
+from utils.logger import logger
+
+_PRUNE_EVERY = 64
+
+
+class CheckpointStore:
+    def __init__(self, path: str = CHECKPOINT_PATH, ttl: float = CHECKPOINT_TTL, max_runs: int = CHECKPOINT_MAX_RUNS):
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        self.ttl = ttl
+        self.max_runs = max_runs
+        self._touches = 0
+        self._touch_lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # check_same_thread=False is safe: SqliteSaver serializes access with its own lock
+        self.saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+        with self.saver.cursor() as cur:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_runs ("
+                "thread_id TEXT PRIMARY KEY, goal TEXT, accessed_at REAL NOT NULL)"
+            )
+        self.prune()
+
+    def touch(self, run_id: str, goal: str):
+        with self.saver.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoint_runs (thread_id, goal, accessed_at) VALUES (?, ?, ?)",
+                (run_id, goal, time.time()),
+            )
+        with self._touch_lock:
+            self._touches += 1
+            due = self._touches % _PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def compact(self, run_id: str):
+        """Keep only the latest checkpoint (and its pending writes) of a run."""
+        latest = ("SELECT max(checkpoint_id) FROM checkpoints "
+                  "WHERE thread_id = ? AND checkpoint_ns = c.checkpoint_ns")
+        with self.saver.cursor() as cur:
+            for table in ("checkpoints", "writes"):
+                cur.execute(
+                    f"DELETE FROM {table} AS c WHERE thread_id = ? AND checkpoint_id < ({latest})",
+                    (run_id, run_id),
+                )
+
+    def delete(self, run_id: str):
+        self.saver.delete_thread(run_id)
+        with self.saver.cursor() as cur:
+            cur.execute("DELETE FROM checkpoint_runs WHERE thread_id = ?", (run_id,))
+
+    def prune(self, now: Optional[float] = None) -> List[str]:
+        """Delete expired runs, then the least recently used beyond max_runs; returns their ids."""
+        now = time.time() if now is None else now
+        try:
+            with self.saver.cursor() as cur:
+                expired = cur.execute(
+                    "SELECT thread_id FROM checkpoint_runs WHERE accessed_at <= ?", (now - self.ttl,)
+                ).fetchall()
+                overflow = cur.execute(
+                    "SELECT thread_id FROM checkpoint_runs WHERE accessed_at > ? "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?",
+                    (now - self.ttl, self.max_runs),
+                ).fetchall()
+            removed = [row[0] for row in expired + overflow]
+            for run_id in removed:
+                self.delete(run_id)
+            return removed
+        except sqlite3.Error as e:
+            logger.warning(f"Checkpoint pruning failed: {e}")
+            return []
+
+    def stats(self) -> Dict[str, Any]:
+        with self.saver.cursor(transaction=False) as cur:
+            runs = cur.execute("SELECT count(*) FROM checkpoint_runs").fetchone()[0]
+            checkpoints = cur.execute("SELECT count(*) FROM checkpoints").fetchone()[0]
+            writes = cur.execute("SELECT count(*) FROM writes").fetchone()[0]
+        return {"runs": runs, "checkpoints": checkpoints, "writes": writes}
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Process-wide store (opened, and pruned, on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CheckpointStore()
+    return _store
@@ -0,0 +1,30 @@
+import re
+
+RETRYABLE = "retryable"
+TERMINAL = "terminal"
+
+# Checked first: transient conditions worth another attempt.
+_RETRYABLE_PATTERNS = re.compile(
+    r"Groq API error: (?:408|429|5\d\d)\b|timed? ?out|timeout|connection|temporar|rate limit|No search results",
+    re.IGNORECASE,
+)
+# Deterministic failures: the same inputs will fail the same way.
+_TERMINAL_PATTERNS = re.compile(
+    r"Unsupported expression|No valid arithmetic expression|Unbound variables|division by zero|"
+    r"Unknown tool|Groq API error: 4\d\d\b|Permission denied|Read-only file system|Is a directory|"
+    r"LLM did not return an expression|request shed",
+    re.IGNORECASE,
+)
+
+
+def classify_error(message: str) -> str:
+    """Map an error string from state.errors to RETRYABLE or TERMINAL (unknown errors retry)."""
+    if _RETRYABLE_PATTERNS.search(message):
+        return RETRYABLE
+    if _TERMINAL_PATTERNS.search(message):
+        return TERMINAL
+    return RETRYABLE
+
+
+def is_terminal(errors) -> bool:
+    return any(classify_error(e) == TERMINAL for e in errors)
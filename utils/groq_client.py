@@ -0,0 +1,453 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    GROQ_API_KEY,
+    GROQ_ENDPOINT,
+    LLM_MODEL,
+    TEMPERATURE,
+    GROQ_POOL_SIZE,
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_READ_TIMEOUT,
+    GROQ_MAX_RETRIES,
+    GROQ_BACKOFF_BASE,
+    GROQ_BACKOFF_MAX,
+    GROQ_EST_COMPLETION_TOKENS,
+)
+from monitoring.metrics import GROQ_LATENCY, GROQ_REQUESTS, GROQ_RETRIES, LLM_CACHE
+from utils.llm_cache import LLMCache, get_cache, make_key
+from utils.logger import logger
+from utils.rate_limit import RateLimiter, get_limiter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GroqError(Exception):
+    """Base error for Groq chat completion calls."""
+
+
+class GroqAPIError(GroqError):
+    """Groq answered with a non-200 status."""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        super().__init__(f"Groq API error: {status_code}, {text}")
+
+
+def parse_content(data: Dict[str, Any]) -> str:
+    """Pull the first choice's message content out of a chat completion payload."""
+    choices = data.get("choices") or [{}]
+    content = (choices[0].get("message") or {}).get("content") or ""
+    return content.strip()
+
+
+def parse_sse_line(line: str) -> Optional[str]:
+    """
+    Decode one server-sent-events line of a streamed completion.
+    Returns the delta text ("" for keep-alives/role-only chunks), or None on [DONE].
+    """
+    if not line or not line.startswith("data:"):
+        return ""
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+    choices = json.loads(data).get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size (~4 chars/token) plus a completion allowance, for the TPM bucket."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + GROQ_EST_COMPLETION_TOKENS
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retry `attempt` (0-based): the server's Retry-After
+    (seconds or HTTP date) when given, else exponential backoff with full jitter.
+    """
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = 0.0
+        if delay > 0:
+            return delay + random.uniform(0, GROQ_BACKOFF_BASE)
+    return random.uniform(0, min(GROQ_BACKOFF_MAX, GROQ_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _should_retry(attempt: int, max_retries: int, delay: float) -> bool:
+    return attempt < max_retries and delay <= GROQ_BACKOFF_MAX
+
+
+def _record_attempt(start: float, status):
+    GROQ_LATENCY.observe(time.perf_counter() - start, str(status))
+    GROQ_REQUESTS.inc(str(status))
+
+
+def _cache_get(cache: LLMCache, key: str) -> Optional[str]:
+    cached = cache.get(key)
+    LLM_CACHE.inc("hit" if cached is not None else "miss")
+    return cached
+
+
+async def _acache_get(cache: LLMCache, key: str) -> Optional[str]:
+    """_cache_get for the event loop: memory hits inline, SQLite reads in a worker thread."""
+    cached = cache.get_memory(key)
+    if cached is not None:
+        LLM_CACHE.inc("hit")
+        return cached
+    if not cache.persistent:
+        return _cache_get(cache, key)
+    return await asyncio.to_thread(_cache_get, cache, key)
+
+
+async def _acache_set(cache: LLMCache, key: str, value: str):
+    if cache.persistent:
+        await asyncio.to_thread(cache.set, key, value)
+    else:
+        cache.set(key, value)
+
+
+class GroqClient:
+    """
+    Thin chat-completions client over a keep-alive connection pool.
+    A single instance is meant to be shared by every node and thread:
+    the urllib3 pool behind the session is thread-safe and reuses
+    TCP/TLS connections across calls.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GROQ_API_KEY,
+        endpoint: str = GROQ_ENDPOINT,
+        model: Optional[str] = LLM_MODEL,
+        pool_size: int = GROQ_POOL_SIZE,
+        connect_timeout: float = GROQ_CONNECT_TIMEOUT,
+        read_timeout: float = GROQ_READ_TIMEOUT,
+        cache: Optional[LLMCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = GROQ_MAX_RETRIES,
+    ):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.model = model
+        self.cache = cache
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def build_payload(self, messages: List[Dict[str, str]], temperature: float = TEMPERATURE, stream: bool = False) -> Dict[str, Any]:
+        payload = {"model": self.model, "messages": messages, "temperature": temperature}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def chat(self, messages: List[Dict[str, str]], temperature: float = TEMPERATURE, use_cache: bool = True) -> str:
+        """
+        POST a chat completion and return the stripped content ("" if empty).
+        Non-empty answers are cached by (model, messages, temperature);
+        use_cache=False skips both the lookup and the store.
+        """
+        key = make_key(self.model, messages, temperature) if self.cache and use_cache else None
+        if key:
+            cached = _cache_get(self.cache, key)
+            if cached is not None:
+                return cached
+        payload = self.build_payload(messages, temperature)
+        estimate = estimate_tokens(messages)
+        resp = self._post(payload, estimate)
+        data = resp.json()
+        if self.limiter and data.get("usage"):
+            self.limiter.adjust_tokens(data["usage"].get("total_tokens", estimate) - estimate)
+        content = parse_content(data)
+        if key and content:
+            self.cache.set(key, content)
+        return content
+
+    def _post(self, payload: Dict[str, Any], estimate: int, stream: bool = False) -> requests.Response:
+        """
+        Rate-limited POST returning a 200 response. 429/5xx and connection
+        errors are retried with backoff that honours Retry-After.
+        """
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.acquire(estimate)
+            start = time.perf_counter()
+            try:
+                resp = self.session.post(self.endpoint, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                _record_attempt(start, "error")
+                delay = retry_delay(attempt)
+                if not _should_retry(attempt, self.max_retries, delay):
+                    raise
+                GROQ_RETRIES.inc("connection")
+                logger.warning(f"Groq request failed ({e}); retrying in {delay:.2f}s")
+            else:
+                _record_attempt(start, resp.status_code)
+                if resp.status_code == 200:
+                    return resp
+                delay = retry_delay(attempt, resp.headers.get("Retry-After"))
+                if resp.status_code not in RETRY_STATUSES or not _should_retry(attempt, self.max_retries, delay):
+                    raise GroqAPIError(resp.status_code, resp.text)
+                resp.close()
+                GROQ_RETRIES.inc(str(resp.status_code))
+                logger.warning(f"Groq returned {resp.status_code}; retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def chat_stream(self, messages: List[Dict[str, str]], temperature: float = TEMPERATURE, use_cache: bool = True) -> Iterator[str]:
+        """
+        Stream a chat completion (stream=True SSE), yielding text deltas as they arrive.
+        A cache hit is yielded as a single chunk; the assembled answer is cached at the end.
+        """
+        key = make_key(self.model, messages, temperature) if self.cache and use_cache else None
+        if key:
+            cached = _cache_get(self.cache, key)
+            if cached is not None:
+                yield cached
+                return
+        payload = self.build_payload(messages, temperature, stream=True)
+        parts = []
+        with self._post(payload, estimate_tokens(messages), stream=True) as resp:
+            for line in resp.iter_lines(decode_unicode=True):
+                delta = parse_sse_line(line)
+                if delta is None:
+                    break
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        content = "".join(parts).strip()
+        if key and content:
+            self.cache.set(key, content)
+
+    def warm_up(self) -> bool:
+        """
+        Open a pooled connection (DNS, TCP, TLS) ahead of the first chat call
+        with a cheap GET on the models endpoint; failures are only logged.
+        """
+        url = self.endpoint.rsplit("/chat/completions", 1)[0] + "/models"
+        try:
+            self.session.get(url, timeout=self.timeout).close()
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Groq warm-up failed: {e}")
+            return False
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncGroqClient:
+    """
+    Non-blocking twin of GroqClient built on httpx.AsyncClient.
+    httpx pools are bound to the event loop that created them, so share
+    one instance per loop (see get_async_client) rather than per process.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GROQ_API_KEY,
+        endpoint: str = GROQ_ENDPOINT,
+        model: Optional[str] = LLM_MODEL,
+        pool_size: int = GROQ_POOL_SIZE,
+        connect_timeout: float = GROQ_CONNECT_TIMEOUT,
+        read_timeout: float = GROQ_READ_TIMEOUT,
+        cache: Optional[LLMCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = GROQ_MAX_RETRIES,
+    ):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.model = model
+        self.cache = cache
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def build_payload(self, messages: List[Dict[str, str]], temperature: float = TEMPERATURE, stream: bool = False) -> Dict[str, Any]:
+        payload = {"model": self.model, "messages": messages, "temperature": temperature}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    async def chat(self, messages: List[Dict[str, str]], temperature: float = TEMPERATURE, use_cache: bool = True) -> str:
+        key = make_key(self.model, messages, temperature) if self.cache and use_cache else None
+        if key:
+            cached = await _acache_get(self.cache, key)
+            if cached is not None:
+                return cached
+        payload = self.build_payload(messages, temperature)
+        estimate = estimate_tokens(messages)
+        resp = await self._send(payload, estimate)
+        await resp.aread()
+        data = resp.json()
+        if self.limiter and data.get("usage"):
+            self.limiter.adjust_tokens(data["usage"].get("total_tokens", estimate) - estimate)
+        content = parse_content(data)
+        if key and content:
+            await _acache_set(self.cache, key, content)
+        return content
+
+    async def _send(self, payload: Dict[str, Any], estimate: int) -> httpx.Response:
+        """Async twin of GroqClient._post; the returned response is opened in streaming mode."""
+        attempt = 0
+        while True:
+            if self.limiter:
+                await self.limiter.acquire_async(estimate)
+            start = time.perf_counter()
+            try:
+                request = self.client.build_request("POST", self.endpoint, json=payload)
+                resp = await self.client.send(request, stream=True)
+            except httpx.TransportError as e:
+                _record_attempt(start, "error")
+                delay = retry_delay(attempt)
+                if not _should_retry(attempt, self.max_retries, delay):
+                    raise
+                GROQ_RETRIES.inc("connection")
+                logger.warning(f"Groq request failed ({e}); retrying in {delay:.2f}s")
+            else:
+                _record_attempt(start, resp.status_code)
+                if resp.status_code == 200:
+                    return resp
+                await resp.aread()
+                await resp.aclose()
+                delay = retry_delay(attempt, resp.headers.get("Retry-After"))
+                if resp.status_code not in RETRY_STATUSES or not _should_retry(attempt, self.max_retries, delay):
+                    raise GroqAPIError(resp.status_code, resp.text)
+                GROQ_RETRIES.inc(str(resp.status_code))
+                logger.warning(f"Groq returned {resp.status_code}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def chat_stream(self, messages: List[Dict[str, str]], temperature: float = TEMPERATURE, use_cache: bool = True) -> AsyncIterator[str]:
+        key = make_key(self.model, messages, temperature) if self.cache and use_cache else None
+        if key:
+            cached = await _acache_get(self.cache, key)
+            if cached is not None:
+                yield cached
+                return
+        payload = self.build_payload(messages, temperature, stream=True)
+        parts = []
+        resp = await self._send(payload, estimate_tokens(messages))
+        try:
+            async for line in resp.aiter_lines():
+                delta = parse_sse_line(line)
+                if delta is None:
+                    break
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            await resp.aclose()
+        content = "".join(parts).strip()
+        if key and content:
+            await _acache_set(self.cache, key, content)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client: Optional[GroqClient] = None
+_client_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroqClient]" = weakref.WeakKeyDictionary()
+_async_closers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_async_factory: Optional[Callable[[], AsyncGroqClient]] = None
+
+
+def get_client() -> GroqClient:
+    """Return the process-wide Groq client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GroqClient(cache=get_cache(), limiter=get_limiter())
+    return _client
+
+
+def set_client(client: Optional[GroqClient]) -> Optional[GroqClient]:
+    """Swap the process-wide client (e.g. to point at a local endpoint); returns the previous one."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
+
+
+def get_async_client() -> AsyncGroqClient:
+    """Return the async Groq client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        factory = _async_factory or (lambda: AsyncGroqClient(cache=get_cache(), limiter=get_limiter()))
+        client = _async_clients[loop] = factory()
+        _async_closers[loop] = _park(_close_with_loop(client))
+    return client
+
+
+def set_async_client_factory(
+    factory: Optional[Callable[[], AsyncGroqClient]],
+) -> Optional[Callable[[], AsyncGroqClient]]:
+    """
+    Swap how per-loop async clients are built (None restores the default);
+    returns the previous factory. Loops that already have a client get a
+    new one from the factory on their next get_async_client().
+    """
+    global _async_factory
+    with _client_lock:
+        previous, _async_factory = _async_factory, factory
+        _async_clients.clear()
+    return previous
+
+
+async def aclose_async_client():
+    """Close the running loop's async client now (the next get_async_client() opens a new one)."""
+    loop = asyncio.get_running_loop()
+    _async_clients.pop(loop, None)
+    closer = _async_closers.pop(loop, None)
+    if closer is not None:
+        await closer.aclose()
+
+
+async def _close_with_loop(client: AsyncGroqClient):
+    # Parked at the yield; loop.shutdown_asyncgens() (run by asyncio.run)
+    # finalizes it, which closes the client's connection pool on that loop.
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+def _park(gen):
+    """Advance an async generator to its first yield synchronously, registering it with the running loop."""
+    try:
+        gen.__anext__().send(None)
+    except StopIteration:
+        pass
+    return gen
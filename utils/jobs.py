@@ -0,0 +1,182 @@
+"""
+Background graph runs shared by every UI session in the process.
+
+JobManager.submit() runs graph.run_stream on a bounded worker pool and
+returns a Job whose progress events can be polled (wait_events) while the
+caller stays responsive. Jobs are keyed on (task, user, prompt), with
+case and spacing folded only for calc and search prompts:
+an identical in-flight job is joined rather than duplicated, and finished
+successful results of side-effect-free tools are served from a TTL cache
+across sessions.
+"""
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import JOB_WORKERS, RESULT_CACHE_TTL, RESULT_CACHE_SIZE
+from utils.logger import logger
+from utils.ttl_cache import TTLCache
+
+_ids = itertools.count(1)
+
+
+# Tasks whose prompts mean the same regardless of case and spacing; others (SQL) are keyed verbatim.
+_FOLDED_TASKS = {"calc", "search"}
+
+
+def normalize_prompt(prompt: str, task: Optional[str] = None) -> str:
+    if task in _FOLDED_TASKS:
+        return re.sub(r"\s+", " ", prompt or "").strip().lower()
+    return (prompt or "").strip()
+
+
+def _side_effect_free(task: str) -> bool:
+    """
+    Only such results are cached: a hit must not skip work the run does
+    outside its state (sql2dbt writes the model file the UI then serves).
+    """
+    from tools.registry import get_tool
+    spec = get_tool(task)
+    return spec is not None and spec.speculative
+
+
+class Job:
+    """One background run; events are appended by the worker and read by index by any session."""
+
+    def __init__(self, key: Tuple[str, str, str], goal: str, user_id: Optional[str] = None):
+        self.id = f"job-{next(_ids)}"
+        self.key = key
+        self.goal = goal
+        self.user_id = user_id
+        self.status = "queued"          # queued -> running -> done | failed
+        self.cached = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.events: List[dict] = []
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def _emit(self, event: dict):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def _finish(self, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        with self._cond:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+            self._cond.notify_all()
+
+    def wait_events(self, since: int = 0, timeout: float = 0.25) -> Tuple[List[dict], bool]:
+        """Events after index `since` (blocking up to `timeout` for new ones) and whether the job is done."""
+        with self._cond:
+            if len(self.events) <= since and not self.done:
+                self._cond.wait(timeout)
+            return self.events[since:], self.done
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS, ttl: float = RESULT_CACHE_TTL, max_entries: int = RESULT_CACHE_SIZE,
+                 max_jobs: int = 1024):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._results = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._inflight: Dict[Tuple[str, str, str], Job] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(goal: str, task: Optional[str] = None, user_id: Optional[str] = None) -> Tuple[str, str, str]:
+        """(task, user, prompt): runs are only shared between requests of the same user."""
+        if task is None:
+            from tools.registry import route
+            task = route(goal).tool
+        return task, user_id or "", normalize_prompt(goal, task)
+
+    def submit(self, goal: str, user_id: Optional[str] = None, task: Optional[str] = None) -> Job:
+        """Start (or join, or answer from cache) the run for this (task, user, prompt)."""
+        key = self.job_key(goal, task, user_id)
+        with self._lock:
+            running = self._inflight.get(key)
+            if running is not None:
+                return running
+            job = Job(key, goal, user_id)
+            self._remember(job)
+            cached = self._results.get(key)
+            if cached is not None:
+                job.cached = True
+                job._emit({"type": "final", "state": cached})
+                job._finish("done", cached)
+                return job
+            self._inflight[key] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            running = len(self._inflight)
+        return {"running": running, "jobs": len(self._jobs), **self._results.stats()}
+
+    def clear_cache(self):
+        self._results.clear()
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._max_jobs:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done:
+                break
+            self._jobs.popitem(last=False)
+
+    def _run(self, job: Job):
+        from graph import run_stream
+
+        job.status = "running"
+        final = None
+        try:
+            for event in run_stream(job.goal, job.user_id):
+                if event["type"] == "final":
+                    final = event["state"] or {}
+                job._emit(event)
+            if final and final.get("tests_passed") and _side_effect_free(job.key[0]):
+                self._results.set(job.key, final)
+            job._finish("done", final)
+        except Exception as e:
+            logger.error(f"Background job {job.id} failed: {e}")
+            job._emit({"type": "final", "state": {"errors": [str(e)]}})
+            job._finish("failed", error=str(e))
+        finally:
+            with self._lock:
+                self._inflight.pop(job.key, None)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide manager, so every Streamlit session shares one pool and one result cache."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
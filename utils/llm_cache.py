@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_MEMORY,
+    LLM_CACHE_MAX_ENTRIES,
+)
+from utils.logger import logger
+
+_EVICT_EVERY = 64
+
+
+def make_key(model: Optional[str], messages: List[Dict[str, str]], temperature: float) -> str:
+    """Content address of a chat request: sha256 over canonical JSON of (model, messages, temperature)."""
+    blob = json.dumps([model, messages, float(temperature)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for chat completions.
+    An in-memory LRU sits in front of a SQLite table; both tiers honour
+    the same TTL and each is bounded by entry count. Pass path=None for
+    a memory-only cache.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = LLM_CACHE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_memory: int = LLM_CACHE_MAX_MEMORY,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()  # memory tier; never held across SQLite calls
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._evict_disk(time.time())
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+        if self._db is not None:
+            now = time.time()
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+            if row and row[1] > now:
+                with self._lock:
+                    self._remember(key, row[1], row[0])
+                    self.disk_hits += 1
+                return row[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """Memory-tier lookup only: never touches SQLite, so it is safe on an event loop. Misses are not counted."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._db.commit()
+                self._writes += 1
+                if self._writes % _EVICT_EVERY == 0:
+                    self._evict_disk(now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        """Drop expired rows, then the least recently used beyond max_entries."""
+        try:
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache eviction failed: {e}")
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when LLM_CACHE_ENABLED is off."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = LLMCache()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM disk cache unavailable, using memory only: {e}")
+                    _cache = LLMCache(path=None)
+    return _cache
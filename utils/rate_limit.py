@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from config import GROQ_RPM, GROQ_TPM, GROQ_MAX_QUEUE, GROQ_MAX_WAIT
+
+
+class RateLimitShed(Exception):
+    """The limiter refused the call instead of queueing it (queue full or wait too long)."""
+
+
+class _Bucket:
+    """Token bucket that allows reservations to drive the level negative (debt = wait time)."""
+
+    __slots__ = ("capacity", "rate", "level", "stamp")
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_after(self, amount: float) -> float:
+        deficit = amount - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Process-wide requests-per-minute and tokens-per-minute limiter.
+    acquire() reserves capacity up front and sleeps for the computed debt,
+    so waiters are served in arrival order without polling. When more than
+    max_queue callers are already waiting, or the wait would exceed
+    max_wait seconds, the call is shed with RateLimitShed.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(
+        self,
+        rpm: float = GROQ_RPM,
+        tpm: float = GROQ_TPM,
+        max_queue: int = GROQ_MAX_QUEUE,
+        max_wait: float = GROQ_MAX_WAIT,
+    ):
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.waiting = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_after(min(amount, bucket.capacity)))
+            if wait > 0 and self.waiting >= self.max_queue:
+                self.shed += 1
+                raise RateLimitShed(f"Groq request shed: {self.waiting} callers already queued")
+            if wait > self.max_wait:
+                self.shed += 1
+                raise RateLimitShed(f"Groq request shed: estimated wait {wait:.1f}s exceeds {self.max_wait:.0f}s")
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.level -= min(amount, bucket.capacity)
+            if wait > 0:
+                self.waiting += 1
+            return wait
+
+    def _done_waiting(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def acquire(self, tokens: int = 1):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._done_waiting()
+
+    async def acquire_async(self, tokens: int = 1):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._done_waiting()
+
+    def adjust_tokens(self, delta: int):
+        """Correct a reservation once the real token usage is known (positive = used more)."""
+        if self._tokens is not None and delta:
+            with self._lock:
+                self._tokens.level -= delta
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """Return the process-wide Groq limiter shared by every node and thread."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
@@ -1,14 +1,108 @@
+import functools
+import inspect
+from dataclasses import dataclass, field, fields
+from typing import Annotated, Any, Callable, Dict, List, Optional
 
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field
+# Reserved key in a context update listing keys the node removed.
+DELETED = "__deleted__"
 
-class AgentState(BaseModel):
-    goal: str = Field(..., description="User objective or query")
-    tool: Optional[str] = Field(None, description="Which tool to run: calc|sql2dbt|search")
-    attempts: int = Field(0, description="Number of attempts to run the tools", ge=0, le=10)
+
+def append_errors(left: List[str], right: List[str]) -> List[str]:
+    """Reducer for `errors`: nodes send only the errors they added."""
+    return left + right if right else left
+
+
+def merge_context(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer for `context`: nodes send only changed keys (plus DELETED for removals)."""
+    if not right:
+        return left
+    merged = {**left, **right}
+    for key in right.get(DELETED, ()):
+        merged.pop(key, None)
+    merged.pop(DELETED, None)
+    return merged
+
+
+@dataclass(slots=True)
+class AgentState:
+    """
+    Graph state. A slotted dataclass, so LangGraph builds it per node without
+    validation; errors and context carry reducers, so a node's update holds
+    only what it changed (see updates_only) and large context values such as
+    SQL text are passed by reference, never copied or re-validated per step.
+    """
+    goal: str                                   # User objective or query
+    tool: Optional[str] = None                  # Which tool to run: calc|sql2dbt|search
+    attempts: int = 0                           # Number of attempts to run the tools
     max_attempts: int = 4
     code: Optional[str] = None
     result: Optional[Any] = None
-    errors: List[str] = []
-    context: Dict[str, Any] = {}
+    errors: Annotated[List[str], append_errors] = field(default_factory=list)
+    context: Annotated[Dict[str, Any], merge_context] = field(default_factory=dict)
     tests_passed: bool = False
+    terminal: bool = False                      # Set when the last failure cannot be fixed by retrying
+
+    def __post_init__(self):
+        # Own the containers (shallow, O(keys)) so in-place edits by a node
+        # never mutate LangGraph's channel values behind its back.
+        self.errors = list(self.errors)
+        self.context = dict(self.context)
+
+
+_SCALARS = tuple(f.name for f in fields(AgentState) if f.name not in ("errors", "context"))
+
+
+def _shallow(value):
+    return value.copy() if isinstance(value, (dict, list)) else value
+
+
+def _changed(old, new) -> bool:
+    return new is not old and new != old
+
+
+def updates_only(node: Callable) -> Callable:
+    """
+    Let a node keep mutating and returning the AgentState object, but hand
+    LangGraph just the difference: changed fields, new errors, and changed /
+    removed context keys. Values are compared by identity first, so large
+    unchanged payloads cost nothing. Nested in-place edits are seen one level
+    deep (e.g. result["explanation"] = ...).
+    """
+
+    def snapshot(state: AgentState):
+        return (
+            [_shallow(getattr(state, name)) for name in _SCALARS],
+            len(state.errors),
+            {k: _shallow(v) for k, v in state.context.items()},
+        )
+
+    def diff(state: AgentState, before) -> Dict[str, Any]:
+        scalars, n_errors, context = before
+        update = {}
+        for name, old in zip(_SCALARS, scalars):
+            new = getattr(state, name)
+            if _changed(old, new):
+                update[name] = new
+        if len(state.errors) > n_errors:
+            update["errors"] = state.errors[n_errors:]
+        ctx = {k: v for k, v in state.context.items() if k not in context or _changed(context[k], v)}
+        removed = [k for k in context if k not in state.context]
+        if removed:
+            ctx[DELETED] = removed
+        if ctx:
+            update["context"] = ctx
+        return update
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: AgentState):
+            before = snapshot(state)
+            return diff(await node(state), before)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: AgentState):
+        before = snapshot(state)
+        return diff(node(state), before)
+    return wrapper
+
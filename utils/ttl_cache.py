@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds.
+    get_or_compute() also collapses concurrent misses for the same key
+    into one call (singleflight): followers wait for the leader's result.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._get_locked(key, time.monotonic())
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._set_locked(key, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], cache_if: Callable[[Any], bool] = bool) -> Any:
+        """Return the cached value or run `compute` once for all concurrent callers of `key`."""
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is not None:
+                return value
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and cache_if(call.value):
+                    self._set_locked(key, call.value)
+                self._inflight.pop(key, None)
+            call.event.set()
+        return call.value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "entries": len(self._data)}
+
+    def _get_locked(self, key: Hashable, now: float) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def _set_locked(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)